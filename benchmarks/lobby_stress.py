@@ -0,0 +1,273 @@
+# benchmarks/lobby_stress.py
+"""Fire thousands of concurrent simulated lobby clicks through the real
+GameManager callbacks and check the lobby invariants afterwards
+
+Every simulated user keeps clicking "Join as Player", "Join as Sponsor" or
+"Leave Slot" on a registered lobby; after a join it waits a little, then
+picks a slot from the picker it was shown, which may be stale by then. The
+button and select callbacks run unchanged against stub interactions,
+including the replies, embed edits and role changes they make after
+releasing the lobby lock. Lobby files go to a temporary data directory.
+
+Run from the repository root:
+    python -m benchmarks.lobby_stress
+"""
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+# Lobby saves really hit the disk, so keep them away from the bot's data
+DATA_DIRECTORY = os.environ["DATA_DIRECTORY"] = tempfile.mkdtemp(prefix="lobby_stress_")
+
+from discord.ui.select import selected_values
+
+import cogs.game_manager as game_manager
+from cogs.game_manager import GameView, PlayerSlotSelect, SponsorSlotSelect, games, lobby_edits
+from utils.data_manager import flush_async
+from utils.lobby import GameSign, _slots_in
+from utils.lobby_roles import LobbyRoles
+
+SLOTS = 24
+USERS = 200
+INTERACTIONS = 20_000
+ROUNDS = 5
+HOST_ID = 1
+CHANNEL_ID = 2
+
+
+class Role:
+    def __init__(self, role_id, name):
+        self.id = role_id
+        self.name = name
+
+
+class Member:
+    def __init__(self, guild, user_id):
+        self.guild = guild
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.role_ids = set()
+        self.role_adds = 0
+        self.dms = 0
+
+    def get_role(self, role_id):
+        return self.guild.get_role(role_id) if role_id in self.role_ids else None
+
+    async def add_roles(self, *roles, reason=None):
+        await asyncio.sleep(0)
+        self.role_adds += 1
+        self.role_ids.update(role.id for role in roles)
+
+    async def remove_roles(self, *roles, reason=None):
+        await asyncio.sleep(0)
+        self.role_ids.difference_update(role.id for role in roles)
+
+    async def send(self, content):
+        await asyncio.sleep(0)
+        self.dms += 1
+
+
+class Guild:
+    def __init__(self):
+        self.id = 1
+        self.roles = []
+        self.members = {}
+
+    def get_member(self, user_id):
+        if user_id not in self.members:
+            self.members[user_id] = Member(self, user_id)
+        return self.members[user_id]
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    async def create_role(self, name, reason=None):
+        await asyncio.sleep(0)
+        self.roles.append(Role(len(self.roles) + 100, name))
+        return self.roles[-1]
+
+
+class Message:
+    def __init__(self):
+        self.edits = 0
+
+    async def edit(self, embed):
+        await asyncio.sleep(0)
+        self.edits += 1
+
+
+class Channel:
+    def __init__(self):
+        self.message = Message()
+
+    def get_partial_message(self, message_id):
+        return self.message
+
+
+class Bot:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def get_channel(self, channel_id):
+        return self.channel if channel_id == CHANNEL_ID else None
+
+
+class Response:
+    def __init__(self):
+        self.content = None
+        self.view = None
+
+    async def send_message(self, content, view=None, ephemeral=False):
+        assert self.content is None, "interaction answered twice"
+        await asyncio.sleep(0)
+        self.content = content
+        self.view = view
+
+
+class Interaction:
+    def __init__(self, guild, user):
+        self.guild = guild
+        self.user = user
+        self.channel_id = CHANNEL_ID
+        self.response = Response()
+
+
+class CountingRoles(LobbyRoles):
+    """LobbyRoles that counts the role grants callers ask for"""
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.requested = 0
+
+    def add(self, member, role):
+        self.requested += 1
+        super().add(member, role)
+
+
+async def think(rng):
+    # Time between seeing the picker and choosing from it
+    for _ in range(rng.randrange(4)):
+        await asyncio.sleep(0)
+
+
+async def user(view, guild, user_id, rng, replies):
+    """One user clicking lobby buttons over and over, concurrently with the rest"""
+    member = guild.get_member(user_id)
+    for _ in range(INTERACTIONS // USERS):
+        await asyncio.sleep(0)
+        await click(view, guild, member, rng, replies)
+
+
+async def click(view, guild, member, rng, replies):
+    button = rng.choice(view.children)
+    interaction = Interaction(guild, member)
+    await button.callback(interaction)
+    picker = interaction.response.view
+    if picker is None:
+        replies[interaction.response.content] += 1
+        return
+
+    await think(rng)
+    select = picker.children[0]
+    assert isinstance(select, (PlayerSlotSelect, SponsorSlotSelect))
+    # Any page of the picker; discord.py hands the chosen values to callbacks
+    # through this context variable
+    option = rng.choice(rng.choice(picker.pages))
+    selected_values.set({select.custom_id: [option.value]})
+    interaction = Interaction(guild, member)
+    await select.callback(interaction)
+    replies[interaction.response.content] += 1
+
+
+async def drain(roles):
+    """Wait for the batched embed edits and role changes to be applied"""
+    while roles._task is not None or lobby_edits._tasks:
+        await asyncio.sleep(0.05)
+
+
+def check(game, guild, role, roles, replies):
+    """Raise AssertionError if the lobby, its indexes or the roles disagree"""
+    players = [p for p in game.players if p is not None]
+    sponsors = [s for s in game.sponsors if s is not None]
+    assert len(players) == len(set(players)), "user holds two player slots"
+    assert len(sponsors) == len(set(sponsors)), "user sponsors two slots"
+
+    assert game.player_slots == {p: i + 1 for i, p in enumerate(game.players) if p is not None}
+    assert game.sponsor_slots == {s: i + 1 for i, s in enumerate(game.sponsors) if s is not None}
+
+    free_players = {num for num, player, _ in game.iter_slots() if player is None}
+    open_sponsors = {num for num, player, sponsor in game.iter_slots() if player is not None and sponsor is None}
+    assert set(_slots_in(game.free_players)) == free_players, "free player bitset out of sync"
+    assert set(_slots_in(game.free_sponsors)) == open_sponsors, "free sponsor bitset out of sync"
+
+    options = [int(option.value) for page in game.player_pages() for option in page]
+    assert options == sorted(free_players), "cached player options are stale"
+
+    key = game.message_id
+    assert games.by_member.keys() == game.members(), "registry member index out of sync"
+    assert all(keys == {key} for keys in games.by_member.values()), "registry member index out of sync"
+    assert games.in_channel(CHANNEL_ID) == [game], "registry channel index out of sync"
+    assert games.named(game.game_name) == [game], "registry name index out of sync"
+    assert games.hosted_by(HOST_ID) == [game], "registry host index out of sync"
+
+    joined = sum(count for content, count in replies.items() if content.startswith("Joined slot"))
+    left = replies["Left your slot!"]
+    assert roles.requested == joined, "role grants don't match successful player claims"
+    role_adds = sum(member.role_adds for member in guild.members.values())
+    assert role_adds <= joined, "more role grants than successful player claims"
+    holders = {str(member.id) for member in guild.members.values() if role.id in member.role_ids}
+    assert holders == set(players), "role holders don't match the players"
+    assert guild.get_member(HOST_ID).dms == left, "host wasn't told about every leave"
+
+
+async def run(seed, roles):
+    rng = random.Random(seed)
+    guild = Guild()
+    channel = Channel()
+    game = GameSign(SLOTS, HOST_ID, seed + 1, "host", "Stress", "Stress", CHANNEL_ID)
+    games.add(game)
+    view = GameView(game.message_id, Bot(channel))
+    replies = Counter()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        user(view, guild, user_id, rng, replies)
+        for user_id in range(HOST_ID + 1, HOST_ID + 1 + USERS)
+    ))
+    seconds = time.perf_counter() - start
+
+    await drain(roles)
+    role = guild.get_role(game.role_id)
+    check(game, guild, role, roles, replies)
+    assert channel.message.edits, "lobby embed was never edited"
+
+    games.remove(game.message_id)
+    game_manager.save_game(game.message_id)
+    await flush_async()
+    return replies, seconds
+
+
+async def main():
+    for seed in range(ROUNDS):
+        # A fresh role queue per round, so its counters only cover this round
+        roles = game_manager.lobby_roles = CountingRoles(game_manager.LOBBY_ROLE_WINDOW)
+        replies, seconds = await run(seed, roles)
+        joined = sum(count for content, count in replies.items() if content.startswith("Joined slot"))
+        sponsored = sum(count for content, count in replies.items() if content.startswith("Now sponsoring"))
+        print(
+            f"round {seed}: {INTERACTIONS} interactions in {seconds:.2f} s  "
+            f"joined={joined} sponsored={sponsored} left={replies['Left your slot!']} "
+            f"refused={INTERACTIONS - joined - sponsored - replies['Left your slot!']}"
+        )
+    print("invariants held")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        shutil.rmtree(DATA_DIRECTORY, ignore_errors=True)
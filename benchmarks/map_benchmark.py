@@ -0,0 +1,46 @@
+# benchmarks/map_benchmark.py
+"""Record output size and render time of the map renderers
+
+Run from the repository root:
+    python -m benchmarks.map_benchmark
+"""
+import random
+import time
+
+from utils.map_generator import create_geojson_map, create_location_map, map_to_bytes
+
+SIZES = (1_000, 10_000, 100_000)
+
+# Rendering one folium object per marker is too slow to be worth timing past this
+MAX_MARKER_POINTS = 10_000
+
+def random_points(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (rng.uniform(-60, 70), rng.uniform(-180, 180), f"user{i}", f"City {i % 500}", f"Country {i % 150}")
+        for i in range(count)
+    ]
+
+def measure(render, points):
+    start = time.perf_counter()
+    size = len(render(points))
+    return size, time.perf_counter() - start
+
+def report(name, count, size, seconds):
+    print(f"{name:<12} {count:>8} points  {size / 1024:>10.1f} KiB  {seconds:>8.2f} s")
+
+def main():
+    renderers = {
+        "markers": lambda points: map_to_bytes(create_location_map(points, clustered=False)).getvalue(),
+        "clustered": lambda points: map_to_bytes(create_location_map(points, clustered=True)).getvalue(),
+        "geojson": lambda points: create_geojson_map(points).encode(),
+    }
+    for count in SIZES:
+        points = random_points(count)
+        for name, render in renderers.items():
+            if name == "markers" and count > MAX_MARKER_POINTS:
+                continue
+            report(name, count, *measure(render, points))
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ import os
 import asyncio
 from dotenv import load_dotenv
 
+from utils.data_manager import flush
+from utils.user_resolver import UserResolver
+
 # Load environment variables first
 load_dotenv()
 
@@ -18,6 +21,9 @@ intents = discord.Intents.default()
 intents.message_content = True  # Required for command handling
 bot = commands.Bot(command_prefix='!', intents=intents)
 
+# Shared user lookup used by all cogs instead of calling fetch_user directly
+bot.user_resolver = UserResolver(bot)
+
 # Remove default help command to use our custom one
 bot.remove_command("help")
 
@@ -38,16 +44,19 @@ async def load_extensions():
         except Exception as e:
             print(f"Failed to load extension {extension}: {e}")
 
+@bot.event
+async def setup_hook():
+    """Called once before connecting to the gateway"""
+    # Loading here rather than in on_ready means persistent views are
+    # registered before the first interaction arrives, and reconnects
+    # don't try to load the extensions again
+    await load_extensions()
+    print("All extensions loaded")
+
 @bot.event
 async def on_ready():
     """Called when the bot is ready and connected to Discord"""
     print(f'Logged in as {bot.user.name}')
-    
-    # Load all extensions
-    await load_extensions()
-    print("All extensions loaded")
-    
-    # Re-register game views (this will be handled by game_manager cog)
     print(f'Bot is ready!')
 
 @bot.command()
@@ -71,4 +80,8 @@ async def on_command_error(ctx, error):
         print(f"Command error: {error}")
 
 if __name__ == "__main__":
-    bot.run(TOKEN)
+    try:
+        bot.run(TOKEN)
+    finally:
+        # Write out anything still queued by the write-behind layer
+        flush()
@@ -2,8 +2,8 @@ import discord
 from discord.ext import commands
 import random
 import asyncio
-import json
-import os
+
+from utils.data_manager import save_json, load_json, thaw
 
 class AuxBattle(commands.Cog):
     def __init__(self, bot):
@@ -26,16 +26,14 @@ class AuxBattle(commands.Cog):
         self.load_data()
 
     def load_data(self):
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.participants = data.get('participants', [])
-                    self.matches = data.get('matches', {})
-                    self.current_tournament = data.get('current_tournament', None)
-                    self.is_signup_open = data.get('is_signup_open', False)
-            except Exception as e:
-                print(f"Error loading aux battle data: {e}")
+        try:
+            data = thaw(load_json(self.data_file))
+            self.participants = data.get('participants', [])
+            self.matches = data.get('matches', {})
+            self.current_tournament = data.get('current_tournament', None)
+            self.is_signup_open = data.get('is_signup_open', False)
+        except Exception as e:
+            print(f"Error loading aux battle data: {e}")
     
     def save_data(self):
         data = {
@@ -44,9 +42,13 @@ class AuxBattle(commands.Cog):
             'current_tournament': self.current_tournament,
             'is_signup_open': self.is_signup_open
         }
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f)
+        save_json(self.data_file, data)
     
+    async def mention(self, user_id, guild):
+        """Mention a player, falling back to a raw mention if they can't be fetched"""
+        user = await self.bot.user_resolver.resolve(user_id, guild)
+        return user.mention if user else f"<@{user_id}>"
+
     @commands.group(name="auxbattle", aliases=["aux"], invoke_without_command=True)
     async def auxbattle(self, ctx):
         """Main command for Aux Battle. Use subcommands for specific actions."""
@@ -98,26 +100,33 @@ class AuxBattle(commands.Cog):
             
         embed = discord.Embed(title="Aux Battle Tournament Bracket", color=discord.Color.gold())
         
+        # Resolve every player in the bracket in one batch
+        player_ids = [
+            player_id
+            for round_matches in self.current_tournament['rounds']
+            for match_id in round_matches
+            for player_id in (self.matches[match_id]['player1'], self.matches[match_id]['player2'])
+            if player_id
+        ]
+        try:
+            players = await self.bot.user_resolver.resolve_many(player_ids, ctx.guild)
+        except discord.HTTPException:
+            players = {}
+        
         for round_idx, round_matches in enumerate(self.current_tournament['rounds']):
             round_text = ""
             for match_idx, match_id in enumerate(round_matches):
                 match = self.matches[match_id]
                 
                 # Get player names
-                try:
-                    player1 = await self.bot.fetch_user(match['player1'])
-                    player1_name = player1.name
-                except:
-                    player1_name = "TBD"
-                    
-                try:
-                    if match['player2']:
-                        player2 = await self.bot.fetch_user(match['player2'])
-                        player2_name = player2.name
-                    else:
-                        player2_name = "BYE"
-                except:
-                    player2_name = "TBD"
+                player1 = players.get(match['player1'])
+                player1_name = player1.name if player1 else "TBD"
+                
+                if match['player2']:
+                    player2 = players.get(match['player2'])
+                    player2_name = player2.name if player2 else "TBD"
+                else:
+                    player2_name = "BYE"
                 
                 # Show winner if match is completed
                 if match['status'] == 'completed':
@@ -206,10 +215,10 @@ class AuxBattle(commands.Cog):
         """Start a specific match"""
         match = self.matches[match_id]
         
-        # Get player usernames
-        player1 = await self.bot.fetch_user(match['player1'])
+        # Get player mentions
+        player1 = await self.mention(match['player1'], ctx.guild)
         if match['player2']:
-            player2 = await self.bot.fetch_user(match['player2'])
+            player2 = await self.mention(match['player2'], ctx.guild)
         else:
             # Handle bye match
             match['status'] = 'completed'
@@ -220,13 +229,13 @@ class AuxBattle(commands.Cog):
         embed = discord.Embed(title=f"Aux Battle - Match {match_id}", 
                             color=discord.Color.green())
         embed.set_image(url=match['image'])
-        embed.add_field(name="Players", value=f"{player1.mention} vs {player2.mention}", inline=False)
+        embed.add_field(name="Players", value=f"{player1} vs {player2}", inline=False)
         embed.add_field(name="Instructions", 
                     value=f"Submit a song that matches this image using `!auxbattle submit [song_link]`\nYou have {self.submission_timer//60} minutes to submit!", 
                     inline=False)
         
         await ctx.send(embed=embed)
-        await ctx.send(f"{player1.mention} and {player2.mention}, please submit your songs for match {match_id}!")
+        await ctx.send(f"{player1} and {player2}, please submit your songs for match {match_id}!")
 
     async def start_all_matches(self, ctx):
         """Start all active matches in the current round simultaneously"""
@@ -261,15 +270,15 @@ class AuxBattle(commands.Cog):
         """Start voting for a specific match"""
         match = self.matches[match_id]
         
-        # Get player usernames
-        player1 = await self.bot.fetch_user(match['player1'])
-        player2 = await self.bot.fetch_user(match['player2'])
+        # Get player mentions
+        player1 = await self.mention(match['player1'], ctx.guild)
+        player2 = await self.mention(match['player2'], ctx.guild)
         
         # Create voting embed
         embed = discord.Embed(title=f"Aux Battle - Match {match_id} - VOTE!", 
                             color=discord.Color.blue())
         embed.set_image(url=match['image'])
-        embed.add_field(name="Players", value=f"{player1.mention} vs {player2.mention}", inline=False)
+        embed.add_field(name="Players", value=f"{player1} vs {player2}", inline=False)
         embed.add_field(name="Song 1", value=match['song1'], inline=True)
         embed.add_field(name="Song 2", value=match['song2'], inline=True)
         embed.add_field(name="Instructions", 
@@ -315,20 +324,20 @@ class AuxBattle(commands.Cog):
                     match['votes2'] = max(0, reaction.count - 1)
             
             # Determine winner
-            player1 = await self.bot.fetch_user(match['player1'])
-            player2 = await self.bot.fetch_user(match['player2'])
+            player1 = await self.mention(match['player1'], ctx.guild)
+            player2 = await self.mention(match['player2'], ctx.guild)
             
             if match['votes1'] > match['votes2']:
                 match['winner'] = match['player1']
-                await ctx.send(f"Match {match_id} results: {player1.mention} wins with {match['votes1']} votes vs {match['votes2']} votes!")
+                await ctx.send(f"Match {match_id} results: {player1} wins with {match['votes1']} votes vs {match['votes2']} votes!")
             elif match['votes2'] > match['votes1']:
                 match['winner'] = match['player2']
-                await ctx.send(f"Match {match_id} results: {player2.mention} wins with {match['votes2']} votes vs {match['votes1']} votes!")
+                await ctx.send(f"Match {match_id} results: {player2} wins with {match['votes2']} votes vs {match['votes1']} votes!")
             else:
                 # In case of a tie, choose randomly
                 match['winner'] = random.choice([match['player1'], match['player2']])
                 winner = player1 if match['winner'] == match['player1'] else player2
-                await ctx.send(f"Match {match_id} resulted in a tie! {winner.mention} wins by random selection!")
+                await ctx.send(f"Match {match_id} resulted in a tie! {winner} wins by random selection!")
             
             match['status'] = 'completed'
             self.save_data()
@@ -360,14 +369,14 @@ class AuxBattle(commands.Cog):
                     # Player 1 didn't submit, player 2 wins by default
                     match['winner'] = match['player2']
                     match['status'] = 'completed'
-                    player2 = await self.bot.fetch_user(match['player2'])
-                    await ctx.send(f"Match {match_id}: {player2.mention} wins by default (opponent didn't submit)")
+                    player2 = await self.mention(match['player2'], ctx.guild)
+                    await ctx.send(f"Match {match_id}: {player2} wins by default (opponent didn't submit)")
                 elif not match['song2'] and match['player1'] is not None:
                     # Player 2 didn't submit, player 1 wins by default
                     match['winner'] = match['player1']
                     match['status'] = 'completed'
-                    player1 = await self.bot.fetch_user(match['player1'])
-                    await ctx.send(f"Match {match_id}: {player1.mention} wins by default (opponent didn't submit)")
+                    player1 = await self.mention(match['player1'], ctx.guild)
+                    await ctx.send(f"Match {match_id}: {player1} wins by default (opponent didn't submit)")
                 elif match['song1'] and match['song2']:
                     # Both submitted, start voting
                     match['status'] = 'voting'
@@ -437,9 +446,9 @@ class AuxBattle(commands.Cog):
                 # Tournament is complete
                 final_match_id = self.current_tournament['rounds'][current_round][0]
                 final_match = self.matches[final_match_id]
-                winner = await self.bot.fetch_user(final_match['winner'])
+                winner = await self.mention(final_match['winner'], ctx.guild)
                 
-                await ctx.send(f"🏆 **TOURNAMENT COMPLETE!** 🏆\n\nCongratulations to {winner.mention} for winning the Aux Battle Tournament!")
+                await ctx.send(f"🏆 **TOURNAMENT COMPLETE!** 🏆\n\nCongratulations to {winner} for winning the Aux Battle Tournament!")
                 return
             
             # Create next round matches
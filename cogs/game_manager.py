@@ -1,21 +1,113 @@
+import os
+
 import discord
-from discord import SelectOption
 from discord.ext import commands
 from discord.ui import View, Button, Select
-from discord.utils import get
 
-# Dictionary to store active games
-games = {}
+from utils.data_manager import save_json, read_json, delete_json
+from utils.edit_coalescer import EditCoalescer
+from utils.lobby import Claim, GameSign, LobbyRegistry
+from utils.lobby_roles import LobbyRoles
+from config import GAMES_FILE, GAMES_DIRECTORY, LOBBY_EDIT_WINDOW, LOBBY_ROLE_WINDOW
+
+# Active games by lobby message id
+games = LobbyRegistry()
+
+# Lobby message edits, at most one per lobby every LOBBY_EDIT_WINDOW seconds
+lobby_edits = EditCoalescer(window=LOBBY_EDIT_WINDOW)
+# Cached lobby roles and batched role changes
+lobby_roles = LobbyRoles(window=LOBBY_ROLE_WINDOW)
+
+# Replies for claims that were refused
+CLAIM_ERRORS = {
+    Claim.INVALID_SLOT: "That slot doesn't exist!",
+    Claim.ALREADY_IN_LOBBY: "You're already in a slot! Leave your current slot first.",
+    Claim.ALREADY_PLAYING: "You're already in a slot! Leave your current slot first.",
+    Claim.ALREADY_SPONSORING: "You're already sponsoring a slot!",
+    Claim.SLOT_TAKEN: "Slot already taken!",
+    Claim.NO_PLAYER: "That slot has no player to sponsor yet!",
+}
+
+def lobby_embed(game):
+    """Render the lobby message embed from the current slots"""
+    embed = discord.Embed(title=f"Game Lobby: {game.game_name}", color=0x00ff00)
+    embed.add_field(name="Host", value=f"{game.hostname} (<@{game.host_id}>)", inline=False)
+
+    slot_text = ""
+    for num, player_id, sponsor_id in game.iter_slots():
+        player = f"<@{player_id}>" if player_id else "Empty"
+        slot_info = f"Slot {num}: {player}"
+
+        # Add sponsor information if there is a sponsor
+        if sponsor_id:
+            slot_info += f"\n   Sponsor: <@{sponsor_id}>"
+
+        if len(slot_text) + len(slot_info) > 1024:
+            embed.add_field(name="Slots", value=slot_text, inline=False)
+            slot_text = slot_info
+        else:
+            slot_text += "\n" + slot_info if slot_text else slot_info
+
+    if slot_text:
+        embed.add_field(name="Slots", value=slot_text, inline=False)
+    return embed
+
+def open_lobby(game_id, interaction):
+    """Return an open lobby, taking its channel from the interaction if it was saved without one"""
+    game = games.get(game_id)
+    if game and game.channel_id is None and interaction.channel_id:
+        games.set_channel(game, interaction.channel_id)
+        save_game(game_id)
+    return game
+
+def refresh_lobby(bot, game_id):
+    """Queue an edit of the lobby message; bursts of changes share one edit"""
+    game = games.get(game_id)
+    channel = game and bot.get_channel(game.channel_id)
+    if channel:
+        lobby_edits.mark(game_id, channel, game.message_id, lambda: lobby_embed(game))
+
+def game_path(game_id):
+    return os.path.join(GAMES_DIRECTORY, f"{game_id}.json")
 
-class GameSign:
-    def __init__(self, max_slots, host_id, message_id, hostname, game_name, role_name):
-        self.max_slots = max_slots
-        self.host_id = host_id
-        self.message_id = message_id
-        self.hostname = hostname
-        self.game_name = game_name
-        self.role_name = role_name
-        self.slots = {str(i): {"player": None, "sponsor": None} for i in range(1, max_slots + 1)}
+def save_game(game_id):
+    """Queue one lobby's file to be written, or removed if the lobby is gone
+
+    Every lobby has its own file, so a change only serializes and rewrites
+    the lobby it touched; the write-behind layer coalesces bursts.
+    """
+    game = games.get(game_id)
+    if game:
+        save_json(game_path(game_id), game.to_dict())
+    else:
+        delete_json(game_path(game_id))
+
+def load_games():
+    """Load saved lobbies into games, skipping entries that cannot be read"""
+    os.makedirs(GAMES_DIRECTORY, exist_ok=True)
+    for name in sorted(os.listdir(GAMES_DIRECTORY)):
+        # Skip temp files of interrupted writes
+        if not name.endswith(".json") or name.startswith("."):
+            continue
+        try:
+            games.add(GameSign.from_dict(read_json(os.path.join(GAMES_DIRECTORY, name))))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            print(f"Skipping unreadable saved game {name}: {e!r}")
+
+    # Lobbies from the single-file format move into their own files; they
+    # have no channel saved and learn it from the first click
+    if os.path.exists(GAMES_FILE):
+        for key, data in read_json(GAMES_FILE).items():
+            try:
+                game = GameSign.from_dict(data)
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                print(f"Skipping unreadable saved game {key}: {e!r}")
+                continue
+            if game.message_id not in games:
+                games.add(game)
+                save_game(game.message_id)
+        delete_json(GAMES_FILE)
+    return len(games)
 
 class GameView(View):
     def __init__(self, game_id, bot):
@@ -27,40 +119,8 @@ class GameView(View):
         self.add_item(SponsorJoinButton(game_id))
         self.add_item(LeaveButton(game_id))
     
-    async def update_embed(self):
-        game = games.get(self.game_id)
-        if not game:
-            return
-
-        try:
-            channel = self.bot.get_channel(self.game_id)
-            message = await channel.fetch_message(game.message_id)
-            
-            embed = discord.Embed(title=f"Game Lobby: {game.game_name}", color=0x00ff00)
-            embed.add_field(name="Host", value=f"{game.hostname} (<@{game.host_id}>)", inline=False)
-            
-            slots = []
-            slot_text = ""
-            for num, data in game.slots.items():
-                player = f"<@{data['player']}>" if data['player'] else "Empty"
-                slot_info = f"Slot {num}: {player}"
-                
-                # Add sponsor information if there is a sponsor
-                if data['sponsor']:
-                    slot_info += f"\n   Sponsor: <@{data['sponsor']}>"
-                
-                if len(slot_text) + len(slot_info) > 1024:
-                    embed.add_field(name="Slots", value=slot_text, inline=False)
-                    slot_text = slot_info
-                else:
-                    slot_text += "\n" + slot_info if slot_text else slot_info
-            
-            if slot_text:
-                embed.add_field(name="Slots", value=slot_text, inline=False)
-            
-            await message.edit(embed=embed)
-        except Exception as e:
-            print(f"Error updating embed: {e}")
+    def update_embed(self):
+        refresh_lobby(self.bot, self.game_id)
 
 class PlayerJoinButton(Button):
     def __init__(self, game_id):
@@ -68,40 +128,39 @@ class PlayerJoinButton(Button):
         self.game_id = game_id
 
     async def callback(self, interaction: discord.Interaction):
-        game = games[self.game_id]
+        game = open_lobby(self.game_id, interaction)
+        if not game:
+            await interaction.response.send_message("This game lobby is no longer active.", ephemeral=True)
+            return
         user_id = str(interaction.user.id)
         
-        if any(slot["player"] == user_id or slot["sponsor"] == user_id for slot in game.slots.values()):
+        if game.is_member(user_id):
             await interaction.response.send_message("You're already in a slot!", ephemeral=True)
             return
             
-        available_slots = [
-            SelectOption(label=f"Slot {i}", value=str(i))
-            for i in range(1, game.max_slots + 1)
-            if not game.slots[str(i)]["player"]
-        ]
-        
-        if not available_slots:
+        if not game.has_free_player_slot():
             await interaction.response.send_message("All player slots are full!", ephemeral=True)
             return
         
-        # Split into pages of 20 slots each
-        pages = [available_slots[i:i+20] for i in range(0, len(available_slots), 20)]
+        # Free slots in pages of 20, cached until the lobby changes
+        pages = game.player_pages()
         
         # Create a new message with the first page
         view = SimplePaginationView(self.game_id, pages, 0, self.view)
         await interaction.response.send_message("Choose a player slot:", view=view, ephemeral=True)
 
 class SimplePaginationView(View):
-    def __init__(self, game_id, pages, current_page, main_view):
+    def __init__(self, game_id, pages, current_page, main_view, select_class=None):
         super().__init__(timeout=60)
         self.game_id = game_id
         self.pages = pages
         self.current_page = current_page
         self.main_view = main_view
+        # PlayerSlotSelect or SponsorSlotSelect
+        self.select_class = select_class or PlayerSlotSelect
         
         # Add the select menu for the current page
-        self.add_item(PlayerSlotSelect(game_id, pages[current_page], main_view))
+        self.add_item(self.select_class(game_id, pages[current_page], main_view))
         
         # Add navigation buttons if needed
         if len(pages) > 1:
@@ -134,12 +193,12 @@ class SimplePaginationView(View):
 
     async def prev_button_callback(self, interaction: discord.Interaction):
         if self.current_page > 0:
-            new_view = SimplePaginationView(self.game_id, self.pages, self.current_page - 1, self.main_view)
+            new_view = SimplePaginationView(self.game_id, self.pages, self.current_page - 1, self.main_view, self.select_class)
             await interaction.response.edit_message(view=new_view)
     
     async def next_button_callback(self, interaction: discord.Interaction):
         if self.current_page < len(self.pages) - 1:
-            new_view = SimplePaginationView(self.game_id, self.pages, self.current_page + 1, self.main_view)
+            new_view = SimplePaginationView(self.game_id, self.pages, self.current_page + 1, self.main_view, self.select_class)
             await interaction.response.edit_message(view=new_view)
 
 class PlayerSlotSelect(Select):
@@ -149,21 +208,25 @@ class PlayerSlotSelect(Select):
         self.main_view = main_view
 
     async def callback(self, interaction: discord.Interaction):
-        game = games[self.game_id]
-        slot_num = self.values[0]
+        game = games.get(self.game_id)
+        if not game:
+            await interaction.response.send_message("This game lobby is no longer active.", ephemeral=True)
+            return
+        slot_num = int(self.values[0])
         user_id = str(interaction.user.id)
         
-        if any(slot["player"] == user_id or slot["sponsor"] == user_id for slot in game.slots.values()):
-            await interaction.response.send_message("You're already in a slot! Leave your current slot first.", ephemeral=True)
+        async with game.lock:
+            result = game.claim_player(slot_num, user_id)
+            if result is Claim.OK:
+                save_game(self.game_id)
+
+        # Discord calls happen after the claim is committed and the lock released
+        if result is not Claim.OK:
+            await interaction.response.send_message(CLAIM_ERRORS[result], ephemeral=True)
             return
-        
-        if game.slots[slot_num]["player"]:
-            await interaction.response.send_message("Slot already taken!", ephemeral=True)
-        else:
-            game.slots[slot_num]["player"] = user_id
-            await interaction.response.send_message(f"Joined slot {slot_num} as player!", ephemeral=True)
-            await self.main_view.update_embed()
-            await assign_role(interaction.guild, interaction.user, game.role_name)
+        await interaction.response.send_message(f"Joined slot {slot_num} as player!", ephemeral=True)
+        self.main_view.update_embed()
+        await assign_role(interaction.guild, interaction.user, self.game_id)
 
 class SponsorJoinButton(Button):
     def __init__(self, game_id):
@@ -171,48 +234,48 @@ class SponsorJoinButton(Button):
         self.game_id = game_id
 
     async def callback(self, interaction: discord.Interaction):
-        game = games[self.game_id]
+        game = open_lobby(self.game_id, interaction)
+        if not game:
+            await interaction.response.send_message("This game lobby is no longer active.", ephemeral=True)
+            return
         user_id = str(interaction.user.id)
         
-        if any(slot["sponsor"] == user_id for slot in game.slots.values()):
+        if game.sponsor_slot(user_id) is not None:
             await interaction.response.send_message("You're already sponsoring a slot!", ephemeral=True)
             return
             
-        available_slots = [
-            SelectOption(label=f"Slot {i}", value=str(i))
-            for i in range(1, game.max_slots + 1)
-            if game.slots[str(i)]["player"] and not game.slots[str(i)]["sponsor"]
-        ]
-        
-        if not available_slots:
+        if not game.has_free_sponsor_slot():
             await interaction.response.send_message("No available slots to sponsor!", ephemeral=True)
             return
             
-        view = SponsorSlotView(self.game_id, available_slots, self.view)
+        # Open slots in pages of 20, like the player picker
+        view = SimplePaginationView(self.game_id, game.sponsor_pages(), 0, self.view, SponsorSlotSelect)
         await interaction.response.send_message("Choose a slot to sponsor:", view=view, ephemeral=True)
 
-class SponsorSlotView(View):
-    def __init__(self, game_id, options, main_view):
-        super().__init__(timeout=60)
-        self.main_view = main_view
-        self.add_item(SponsorSlotSelect(game_id, options))
-
 class SponsorSlotSelect(Select):
-    def __init__(self, game_id, options):
+    def __init__(self, game_id, options, main_view):
         super().__init__(placeholder="Select a slot...", options=options)
         self.game_id = game_id
+        self.main_view = main_view
 
     async def callback(self, interaction: discord.Interaction):
-        game = games[self.game_id]
-        slot_num = self.values[0]
+        game = games.get(self.game_id)
+        if not game:
+            await interaction.response.send_message("This game lobby is no longer active.", ephemeral=True)
+            return
+        slot_num = int(self.values[0])
         user_id = str(interaction.user.id)
         
-        if game.slots[slot_num]["sponsor"]:
-            await interaction.response.send_message("Slot already sponsored!", ephemeral=True)
-        else:
-            game.slots[slot_num]["sponsor"] = user_id
-            await interaction.response.send_message(f"Now sponsoring slot {slot_num}!", ephemeral=True)
-            await self.view.main_view.update_embed()
+        async with game.lock:
+            result = game.claim_sponsor(slot_num, user_id)
+            if result is Claim.OK:
+                save_game(self.game_id)
+
+        if result is not Claim.OK:
+            await interaction.response.send_message(CLAIM_ERRORS[result], ephemeral=True)
+            return
+        await interaction.response.send_message(f"Now sponsoring slot {slot_num}!", ephemeral=True)
+        self.main_view.update_embed()
 
 class LeaveButton(Button):
     def __init__(self, game_id):
@@ -220,24 +283,25 @@ class LeaveButton(Button):
         self.game_id = game_id
 
     async def callback(self, interaction: discord.Interaction):
-        game = games[self.game_id]
+        game = open_lobby(self.game_id, interaction)
+        if not game:
+            await interaction.response.send_message("This game lobby is no longer active.", ephemeral=True)
+            return
         user_id = str(interaction.user.id)
-        removed = False
-        
-        for slot in game.slots.values():
-            if slot["player"] == user_id or slot["sponsor"] == user_id:
-                slot["player"] = None if slot["player"] == user_id else slot["player"]
-                slot["sponsor"] = None if slot["sponsor"] == user_id else slot["sponsor"]
-                removed = True
+
+        async with game.lock:
+            removed = game.release(user_id)
+            if removed:
+                save_game(self.game_id)
         
         await interaction.response.send_message(
             "Left your slot!" if removed else "You weren't in any slot!",
             ephemeral=True
         )
-        await self.view.update_embed()
+        self.view.update_embed()
         
         if removed:
-            await remove_role(interaction.guild, interaction.user, game.role_name)
+            await remove_role(interaction.guild, interaction.user, self.game_id)
             host = interaction.guild.get_member(int(game.host_id))
             if host:
                 await host.send(f"{interaction.user.name} has left the game lobby.")
@@ -245,18 +309,45 @@ class LeaveButton(Button):
 class GameManager(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        
-    @commands.Cog.listener()
-    async def on_ready(self):
-        # Re-register views for active games
-        for game_id in list(games.keys()):
+
+    async def cog_load(self):
+        # Runs from setup_hook, so lobby buttons work as soon as the gateway connects
+        load_games()
+        for game_id, game in list(games.items()):
             try:
-                self.bot.add_view(GameView(game_id, self.bot))
-                print(f"Re-registered view for game {game_id}")
+                self.bot.add_view(GameView(game_id, self.bot), message_id=game.message_id)
             except Exception as e:
                 print(f"Error re-registering view {game_id}: {e}")
-                del games[game_id]
+                games.remove(game_id)
+                save_game(game_id)
+        if games:
+            print(f"Restored {len(games)} game lobbies")
     
+    async def find_game(self, ctx, game_name=None):
+        """Return the game named game_name, or the one game in this channel
+
+        Sends the reason to ctx and returns None when there is no single match.
+        """
+        if game_name:
+            # Same-named games in other servers don't count
+            matches = [
+                game for game in games.named(game_name)
+                if getattr(self.bot.get_channel(game.channel_id), "guild", None) == ctx.guild
+            ]
+            if len(matches) > 1:
+                matches = [game for game in matches if game.channel_id == ctx.channel.id] or matches
+            missing = f"No game found with name '{game_name}'"
+            ambiguous = f"There are several games called '{game_name}'. Please use the command in the game's channel."
+        else:
+            matches = games.in_channel(ctx.channel.id)
+            missing = "No active game in this channel. Please specify a game name."
+            ambiguous = "There are several games in this channel. Please specify a game name."
+
+        if len(matches) == 1:
+            return matches[0]
+        await ctx.send(ambiguous if matches else missing)
+        return None
+
     @commands.command(aliases=['sg'])
     async def startgame(self, ctx, max_slots: int, host: discord.Member, *, args):
         """Start a new game lobby with specified slots and host"""
@@ -280,63 +371,42 @@ class GameManager(commands.Cog):
         if not game_name:
             return await ctx.send("Please provide a game name.")
 
-        game_id = ctx.channel.id
-        games[game_id] = GameSign(max_slots, host.id, None, host.display_name, game_name, role_name)
-
-        view = GameView(game_id, self.bot)
-        message = await ctx.send(f"Game lobby initializing for {game_name} hosted by {host.mention}...", view=view)
+        game = GameSign(max_slots, host.id, None, host.display_name, game_name, role_name, ctx.channel.id)
+        message = await ctx.send(f"Game lobby initializing for {game_name} hosted by {host.mention}...")
 
-        games[game_id].message_id = message.id
-        await view.update_embed()
+        # Buttons are keyed by the lobby message, so they are attached once it exists
+        game.message_id = message.id
+        games.add(game)
+        save_game(message.id)
+        await message.edit(embed=lobby_embed(game), view=GameView(message.id, self.bot))
 
 
     @commands.command()
     @commands.has_permissions(administrator=True)
     async def addplayer(self, ctx, slot_num: int, player: discord.Member, *, game_name: str = None):
         """Add a player to an empty slot (Admin only)"""
-        # Get the game from the current channel or by name
-        game_id = ctx.channel.id
-        game = games.get(game_id)
-        
+        game = await self.find_game(ctx, game_name)
         if not game:
-            if not game_name:
-                return await ctx.send("No active game in this channel. Please specify a game name.")
-            
-            # Try to find the game by name in any channel
-            for gid, g in games.items():
-                if g.game_name.lower() == game_name.lower():
-                    game = g
-                    game_id = gid
-                    break
-            
-            if not game:
-                return await ctx.send(f"No game found with name '{game_name}'")
-        
-        # Check if slot number is valid
-        if not 1 <= slot_num <= game.max_slots:
-            return await ctx.send(f"Invalid slot number. Please choose between 1 and {game.max_slots}")
-        
-        # Check if slot is already taken
-        slot_key = str(slot_num)
-        if game.slots[slot_key]["player"]:
-            return await ctx.send(f"Slot {slot_num} is already taken by <@{game.slots[slot_key]['player']}>")
+            return
+        game_id = game.message_id
         
-        # Add player to slot
+        # Add player to slot; admins may seat someone who is also sponsoring
         user_id = str(player.id)
-        
-        # Check if player is already in another slot
-        for slot in game.slots.values():
-            if slot["player"] == user_id:
-                return await ctx.send(f"{player.mention} is already in another slot. Please remove them first.")
-        
-        game.slots[slot_key]["player"] = user_id
+        async with game.lock:
+            result = game.claim_player(slot_num, user_id, exclusive=False)
+            if result is Claim.OK:
+                save_game(game_id)
+            current_player = game.slot(slot_num)[0] if result is Claim.SLOT_TAKEN else None
+
+        if result is Claim.INVALID_SLOT:
+            return await ctx.send(f"Invalid slot number. Please choose between 1 and {game.max_slots}")
+        if result is Claim.SLOT_TAKEN:
+            return await ctx.send(f"Slot {slot_num} is already taken by <@{current_player}>")
+        if result is Claim.ALREADY_PLAYING:
+            return await ctx.send(f"{player.mention} is already in another slot. Please remove them first.")
         
         # Update the game embed
-        channel = self.bot.get_channel(game_id)  # Changed bot to self.bot
-        if channel:
-            message = await channel.fetch_message(game.message_id)
-            view = GameView(game_id, self.bot)
-            await view.update_embed()
+        refresh_lobby(self.bot, game_id)
         
         await ctx.send(f"Added {player.mention} to slot {slot_num} in game '{game.game_name}'")
 
@@ -344,60 +414,122 @@ class GameManager(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def removeplayer(self, ctx, slot_num: int, *, game_name: str = None):
         """Remove a player from a slot (Admin only)"""
-        # Get the game from the current channel or by name
-        game_id = ctx.channel.id
-        game = games.get(game_id)
-        
+        game = await self.find_game(ctx, game_name)
         if not game:
-            if not game_name:
-                return await ctx.send("No active game in this channel. Please specify a game name.")
-            
-            # Try to find the game by name in any channel
-            for gid, g in games.items():
-                if g.game_name.lower() == game_name.lower():
-                    game = g
-                    game_id = gid
-                    break
-            
-            if not game:
-                return await ctx.send(f"No game found with name '{game_name}'")
+            return
+        game_id = game.message_id
         
         # Check if slot number is valid
         if not 1 <= slot_num <= game.max_slots:
             return await ctx.send(f"Invalid slot number. Please choose between 1 and {game.max_slots}")
         
-        # Check if slot has a player
-        slot_key = str(slot_num)
-        if not game.slots[slot_key]["player"]:
+        # Remove player and sponsor from slot
+        async with game.lock:
+            player_id, _ = game.slot(slot_num)
+            if player_id:
+                game.clear_slot(slot_num)
+                save_game(game_id)
+
+        if not player_id:
             return await ctx.send(f"Slot {slot_num} is already empty")
         
-        # Get player mention before removing
-        player_id = game.slots[slot_key]["player"]
         player_mention = f"<@{player_id}>"
         
-        # Remove player and sponsor from slot
-        game.slots[slot_key]["player"] = None
-        game.slots[slot_key]["sponsor"] = None
-        
         # Update the game embed
-        channel = self.bot.get_channel(game_id)
-        if channel:
-            message = await channel.fetch_message(game.message_id)
-            view = GameView(game_id, self.bot)
-            await view.update_embed()
+        refresh_lobby(self.bot, game_id)
         
         await ctx.send(f"Removed {player_mention} from slot {slot_num} in game '{game.game_name}'")
 
-async def assign_role(guild, member, role_name):
-    role = get(guild.roles, name=role_name)
-    if not role:
-        role = await guild.create_role(name=role_name)
-    await member.add_roles(role)
+    @commands.command()
+    async def mygames(self, ctx):
+        """List the game lobbies you host or hold a slot in"""
+        user_id = str(ctx.author.id)
+        hosted = games.hosted_by(ctx.author.id)
+        joined = [game for game in games.of_member(user_id) if game not in hosted]
+        if not hosted and not joined:
+            return await ctx.send("You're not in any game lobby.")
+
+        embed = discord.Embed(title="Your Games", color=0x00ff00)
+        for title, lobbies in (("Hosting", hosted), ("Playing", joined)):
+            lines = []
+            for game in lobbies:
+                line = game.game_name + (f" in <#{game.channel_id}>" if game.channel_id else "")
+                player_slot, sponsor_slot = game.player_slot(user_id), game.sponsor_slot(user_id)
+                if player_slot is not None:
+                    line += f" - slot {player_slot}"
+                if sponsor_slot is not None:
+                    line += f" - sponsoring slot {sponsor_slot}"
+                lines.append(line)
+            if lines:
+                embed.add_field(name=title, value="\n".join(lines)[:1024], inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command(aliases=['eg'])
+    @commands.guild_only()
+    async def endgame(self, ctx, *, game_name: str = None):
+        """Close a game lobby and take its role back from the players (host or admin)"""
+        game = await self.find_game(ctx, game_name)
+        if not game:
+            return
+        game_id = game.message_id
+
+        if ctx.author.id != game.host_id and not ctx.author.guild_permissions.administrator:
+            return await ctx.send("Only the host or an administrator can end this game.")
+
+        role = await lobby_role(ctx.guild, game_id, create=False)
+        async with game.lock:
+            if games.get(game_id) is not game:
+                return await ctx.send(f"Game '{game.game_name}' has already ended.")
+            games.remove(game_id)
+            save_game(game_id)
+        lobby_edits.forget(game_id)
+
+        if role:
+            await lobby_roles.clear(ctx.guild, role, game.player_slots)
+
+        channel = self.bot.get_channel(game.channel_id)
+        if channel:
+            try:
+                await channel.get_partial_message(game.message_id).edit(
+                    content=f"Game '{game.game_name}' has ended.", view=None
+                )
+            except discord.HTTPException as e:
+                print(f"Error closing lobby message: {e}")
+        await ctx.send(f"Ended game '{game.game_name}'")
+
+async def lobby_role(guild, game_id, create=True):
+    """Return the role of a lobby (None if it has none), caching its id on first use
+
+    Without create, a role that doesn't exist yet is not created, for
+    callers that only take the role away.
+    """
+    game = games.get(game_id)
+    if not game or not game.role_name:
+        return None
+    if not create:
+        role = lobby_roles.find(guild, game.role_name, game.role_id)
+        if role is None:
+            return None
+    else:
+        try:
+            role = await lobby_roles.resolve(guild, game.role_name, game.role_id)
+        except discord.HTTPException as e:
+            print(f"Error resolving role {game.role_name}: {e}")
+            return None
+    if game.role_id != role.id:
+        game.role_id = role.id
+        save_game(game_id)
+    return role
+
+async def assign_role(guild, member, game_id):
+    role = await lobby_role(guild, game_id)
+    if role:
+        lobby_roles.add(member, role)
 
-async def remove_role(guild, member, role_name):
-    role = get(guild.roles, name=role_name)
-    if role and role in member.roles:
-        await member.remove_roles(role)
+async def remove_role(guild, member, game_id):
+    role = await lobby_role(guild, game_id, create=False)
+    if role:
+        lobby_roles.remove(member, role)
 
 async def setup(bot):
     await bot.add_cog(GameManager(bot))
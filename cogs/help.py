@@ -20,6 +20,8 @@ class HelpCommand(commands.Cog):
             value=( 
                 "`!setloc @user <location>`: Set a user's location (Admin only)\n"
                 "`!remloc @user`: Remove a user's location (Admin only)\n"
+                "`!locimport` + attached CSV/NDJSON: Bulk import locations (Admin only)\n"
+                "`!locexport [csv|ndjson]`: Export all locations (Admin only)\n"
             ),
             inline=False
         )
@@ -27,9 +29,11 @@ class HelpCommand(commands.Cog):
         embed.add_field(
             name="User Commands",
             value=( 
-                "`!locations`: Show all user locations grouped by continent and country\n"
-                "`!map`: Generate interactive map of user locations\n"
-                "`!mapheat`: Generate heatmap of user locations\n"
+                "`!locations [continent|country]`: Browse user locations page by page, optionally for one region\n"
+                "`!map [png]`: Generate interactive map of user locations (or a static image)\n"
+                "`!mapheat [png]`: Generate heatmap of user locations (or a static image)\n"
+                "`!nearby [km]`: Show users near your location\n"
+                "`!near @user [km]`: Show users near another user's location\n"
                 "`!mysetloc <location>`: Set your own location\n"
                 "`!myremoveloc`: Remove your own location"
             ),
@@ -42,6 +46,8 @@ class HelpCommand(commands.Cog):
                 "`!startgame <max_players> @host [-role <role_name>] <game_name>`: Start a new game\n"
                 "`!addplayer <slot_num> @player [game_name]`: Add a player to an empty slot (Admin only)\n"
                 "`!removeplayer <slot_num> [game_name]`: Remove a player from a slot (Admin only)\n"
+                "`!mygames`: List the games you host or hold a slot in\n"
+                "`!endgame [game_name]`: Close a game and remove its role from the players (Host or Admin)\n"
             ),
             inline=False
         )
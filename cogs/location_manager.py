@@ -1,50 +1,343 @@
 # cogs/location_manager.py
 import discord
-from discord.ext import commands
-import pycountry_convert as pc
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderUnavailable
+from discord.ext import commands, tasks
+from discord.ui import View, Button
+from io import BytesIO
+import asyncio
+import os
+import tempfile
 
-from utils.data_manager import save_json, load_json
-from utils.map_generator import create_location_map, create_heatmap, map_to_bytes
-from config import LOCATIONS_FILE, GEOCODER_USER_AGENT
+import aiohttp
+
+from utils.geocode_cache import GeocodeCache
+from utils.geocoder import GeocodingService, GeocoderUnavailable
+from utils.gazetteer import CountryTable, Gazetteer
+from utils.location_store import LocationStore
+from utils.location_partitions import LocationPartitions
+from utils.live_map import LiveMapServer
+from utils.location_io import LocationImporter, detect_format, parse_rows, stream_lines, write_export
+from utils.map_generator import render_location_map, render_heatmap
+from utils.static_map import render_location_png, render_heatmap_png
+from utils.render_pool import RenderPool
+from utils.render_cache import RenderCache
+from config import (
+    LOCATIONS_FILE, LOCATIONS_DB, LOCATIONS_DIRECTORY, LOCATION_PARTITION_IDLE_SECONDS,
+    GEOCODER_USER_AGENT, GEOCODER_URL, GEOCODER_RATE,
+    GAZETTEER_INDEX, GEOCODE_CACHE_FILE, GEOCODE_CACHE_TTL, GEOCODE_CACHE_MAX_ENTRIES,
+    MAP_RENDER_WORKERS, MAP_MAX_CONCURRENT_RENDERS,
+    RENDER_CACHE_DIRECTORY, RENDER_CACHE_MEMORY_BYTES, RENDER_CACHE_DISK_BYTES,
+    NEARBY_DEFAULT_KM,
+    LIVE_MAP_ENABLED, LIVE_MAP_HOST, LIVE_MAP_PORT, LIVE_MAP_PUBLIC_URL, LIVE_MAP_SECRET,
+    LOCATION_IMPORT_CONCURRENCY, LOCATION_IMPORT_BATCH_SIZE
+)
+
+# Maximum number of users listed by !nearby / !near
+NEARBY_LIMIT = 20
+
+# Users per !locations page; keeps every page well inside Discord's embed limits
+LOCATIONS_PAGE_SIZE = 30
+# Regions listed in a !locations page description before the rest are summarised
+SUMMARY_LIMIT = 25
+# Discord rejects embeds with more fields than this
+MAX_EMBED_FIELDS = 25
+
+class LocationPagesView(View):
+    """Previous/Next navigation over the store's keyset-paginated locations
+
+    Only the rows of the current page are read; totals come from the
+    location_counts aggregate, so a page costs the same for any server size.
+    """
+
+    def __init__(self, partitions, guild_id, author_id, continent=None, country=None):
+        super().__init__(timeout=120)
+        self.partitions = partitions
+        self.guild_id = guild_id
+        self.author_id = author_id
+        self.continent = continent
+        self.country = country
+        self.message = None
+        self.total = self.store.region_count(continent, country)
+        self.total_pages = max(1, -(-self.total // LOCATIONS_PAGE_SIZE))
+        # Start key of every page visited so far; None starts at the beginning
+        self.starts = [None]
+        self.rows = []
+        self.more = False
+
+        self.prev_button = Button(label="Previous", style=discord.ButtonStyle.secondary)
+        self.prev_button.callback = self.prev_button_callback
+        self.page_indicator = Button(style=discord.ButtonStyle.gray, disabled=True)
+        self.next_button = Button(label="Next", style=discord.ButtonStyle.secondary)
+        self.next_button.callback = self.next_button_callback
+        for item in (self.prev_button, self.page_indicator, self.next_button):
+            self.add_item(item)
+
+    @property
+    def store(self):
+        # Looked up on every use: the partition may be evicted and reopened meanwhile
+        return self.partitions.get(self.guild_id).store
+
+    def render(self):
+        """Load the current page and build its embed, or None if it is empty"""
+        self.rows = self.store.page(
+            after=self.starts[-1], limit=LOCATIONS_PAGE_SIZE,
+            continent=self.continent, country=self.country
+        )
+        if not self.rows:
+            return None
+        self.more = len(self.rows) == LOCATIONS_PAGE_SIZE
+
+        title = "User Locations" + (f" in {self.country or self.continent}" if self.country or self.continent else "")
+        embed = discord.Embed(title=title, description=self._summary(), color=0x00ff00)
+
+        # Group this page's rows by country, then city (rows arrive in that order)
+        grouped = {}
+        for continent, country, city, user_id in self.rows:
+            grouped.setdefault((continent, country), {}).setdefault(city, []).append(user_id)
+
+        shown = 0
+        for (continent, country), cities in grouped.items():
+            lines = []
+            for city, user_ids in cities.items():
+                count = self.store.city_count(continent, country, city)
+                user_list = ", ".join(f"<@{user_id}>" for user_id in user_ids)  # Use mention for clickable profiles
+                lines.append(f"**{city}** ({count}): {user_list}")
+            chunks = list(_field_chunks(lines))
+            if shown and len(embed.fields) + len(chunks) > MAX_EMBED_FIELDS:
+                # End the page here; the next one starts at this country
+                self.rows = self.rows[:shown]
+                self.more = True
+                break
+            name = f"🌐 {country}" if self.continent or self.country else f"🌏 {continent} › 🌐 {country}"
+            for chunk in chunks[:MAX_EMBED_FIELDS - len(embed.fields)]:
+                embed.add_field(name=name, value=chunk, inline=False)
+                name = "\u200b"
+            shown += sum(len(user_ids) for user_ids in cities.values())
+
+        # Short pages push later rows back, so the estimate only grows
+        page = len(self.starts)
+        pages = max(self.total_pages, page + 1) if self.more else page
+        self.prev_button.disabled = page == 1
+        self.next_button.disabled = not self.more
+        self.page_indicator.label = f"Page {page}/{pages}"
+        embed.set_footer(text=f"Page {page}/{pages} · {self.total} users")
+        return embed
+
+    def _summary(self):
+        if self.country:
+            counts = self.store.city_counts(self.country)
+        elif self.continent:
+            counts = self.store.country_counts(self.continent)
+        else:
+            counts = self.store.continent_counts()
+        lines = [f"**{name}**: {users}" for name, users in counts[:SUMMARY_LIMIT]]
+        if len(counts) > SUMMARY_LIMIT:
+            lines.append(f"…and {len(counts) - SUMMARY_LIMIT} more")
+        return "\n".join(lines)
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Run `!locations` yourself to browse.", ephemeral=True)
+            return False
+        return True
+
+    async def prev_button_callback(self, interaction: discord.Interaction):
+        if len(self.starts) > 1:
+            self.starts.pop()
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    async def next_button_callback(self, interaction: discord.Interaction):
+        if self.rows and self.more:
+            self.starts.append(tuple(self.rows[-1]))
+        embed = self.render()
+        if embed is None:
+            # Rows were removed since the page was shown; stay on the last page
+            self.starts.pop()
+            embed = self.render()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+def _field_chunks(lines, limit=1024):
+    """Join lines into embed field values no longer than limit"""
+    chunk = ""
+    for line in lines:
+        if len(line) > limit:
+            line = line[:limit - 1] + "…"
+        if chunk and len(chunk) + 1 + len(line) > limit:
+            yield chunk
+            chunk = ""
+        chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        yield chunk
 
 class LocationManager(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.geolocator = Nominatim(user_agent=GEOCODER_USER_AGENT)
-    
-    def get_continent(self, country_name):
-        try:
-            country_code = pc.country_name_to_country_alpha2(country_name)
-            return pc.convert_continent_code_to_continent_name(
-                pc.country_alpha2_to_continent_code(country_code)
+        if os.path.exists(LOCATIONS_FILE):
+            legacy = LocationStore(LOCATIONS_DB)
+            migrated = legacy.migrate_from_json(LOCATIONS_FILE)
+            legacy.close()
+            if migrated:
+                print(f"Migrated {migrated} locations from {LOCATIONS_FILE}")
+        self.partitions = LocationPartitions(
+            LOCATIONS_DIRECTORY,
+            idle_timeout=LOCATION_PARTITION_IDLE_SECONDS,
+            legacy_db=LOCATIONS_DB
+        )
+        self.geocode_cache = GeocodeCache(
+            GEOCODE_CACHE_FILE,
+            ttl=GEOCODE_CACHE_TTL,
+            max_entries=GEOCODE_CACHE_MAX_ENTRIES
+        )
+        self.countries = CountryTable()
+        self.gazetteer = Gazetteer(GAZETTEER_INDEX, countries=self.countries)
+        self.geocoder = GeocodingService(
+            GEOCODER_URL,
+            GEOCODER_USER_AGENT,
+            self.get_continent,
+            cache=self.geocode_cache,
+            gazetteer=self.gazetteer,
+            rate=GEOCODER_RATE
+        )
+        self.render_pool = RenderPool(
+            workers=MAP_RENDER_WORKERS,
+            max_concurrent=MAP_MAX_CONCURRENT_RENDERS
+        )
+        self.render_cache = RenderCache(
+            RENDER_CACHE_DIRECTORY,
+            max_memory_bytes=RENDER_CACHE_MEMORY_BYTES,
+            max_disk_bytes=RENDER_CACHE_DISK_BYTES
+        )
+        self.import_lock = asyncio.Lock()
+        self._seeding = {}
+        self.live_map = None
+
+    async def cog_load(self):
+        if LIVE_MAP_ENABLED:
+            # Links built from the listen address (e.g. 0.0.0.0) can't be opened
+            if not LIVE_MAP_PUBLIC_URL:
+                raise RuntimeError("LIVE_MAP_PUBLIC_URL must be set when LIVE_MAP_ENABLED is true")
+            self.live_map = LiveMapServer(
+                self.partitions,
+                LIVE_MAP_HOST,
+                LIVE_MAP_PORT,
+                LIVE_MAP_PUBLIC_URL,
+                secret=LIVE_MAP_SECRET
             )
-        except:
-            return "Unknown"
+        self.evict_partitions.start()
+        if self.live_map:
+            await self.live_map.start()
+            print(f"Live map listening on {LIVE_MAP_HOST}:{LIVE_MAP_PORT}")
+
+    async def cog_unload(self):
+        self.evict_partitions.cancel()
+        if self.live_map:
+            await self.live_map.stop()
+        await self.geocoder.close()
+        self.partitions.close()
+        self.gazetteer.close()
+        self.render_pool.shutdown()
+
+    async def cog_check(self, ctx):
+        # Locations are stored per server, so there is nothing to show in DMs
+        if ctx.guild is None:
+            raise commands.NoPrivateMessage()
+        return True
+
+    async def cog_before_invoke(self, ctx):
+        # A server's first location command since the upgrade copies in the
+        # legacy locations of its members, and nobody else's
+        if self.partitions.needs_legacy_import(ctx.guild.id):
+            task = self._seeding.get(ctx.guild.id)
+            if task is None:
+                task = self._seeding[ctx.guild.id] = asyncio.create_task(self.seed_partition(ctx.guild))
+                task.add_done_callback(lambda _: self._seeding.pop(ctx.guild.id, None))
+            await asyncio.shield(task)
+
+    async def seed_partition(self, guild):
+        """Create a guild's partition from the legacy locations of its members"""
+        user_ids = self.partitions.legacy_user_ids()
+        members = set()
+        # query_members takes 100 ids per request and needs no members intent
+        for start in range(0, len(user_ids), 100):
+            chunk = user_ids[start:start + 100]
+            try:
+                found = await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False)
+            except (asyncio.TimeoutError, discord.ClientException) as e:
+                # Leave the partition uncreated so the next command tries again
+                print(f"Error checking legacy members of {guild.id}: {e!r}")
+                raise commands.CommandError("Couldn't load this server's saved locations, please try again.")
+            members.update(member.id for member in found)
+        partition = self.partitions.get(guild.id, members=members)
+        print(f"Seeded {len(partition.columns)} legacy locations for guild {guild.id}")
+
+    @tasks.loop(minutes=5)
+    async def evict_partitions(self):
+        self.partitions.evict_idle()
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        # Servers joined from now on start empty instead of inheriting the legacy data
+        self.partitions.get(guild.id)
+
+    def partition(self, guild):
+        return self.partitions.get(guild.id)
+
+    def set_location(self, guild, user_id, record):
+        """Store a user's location and update the in-memory indexes"""
+        self.partition(guild).upsert(user_id, record)
+
+    def set_locations(self, guild, records):
+        """Store many (user_id, record) pairs in one transaction"""
+        self.partition(guild).upsert_many(records)
+
+    def remove_location(self, guild, user_id):
+        """Remove a user's location, returning True if one existed"""
+        return self.partition(guild).delete(user_id)
+
+    async def send_map(self, ctx, func, points, content, filename):
+        """Render a map (or reuse an identical earlier render) and send it"""
+        key = self.render_cache.key(func.__name__, points)
+
+        # Link the previous upload if nothing changed since it was made
+        url = self.render_cache.get_url(key)
+        if url:
+            await ctx.send(f"{content} {url}")
+            return
+
+        data = self.render_cache.get(key)
+        if data is None:
+            if self.render_pool.queue_depth or self.render_pool.semaphore.locked():
+                await ctx.send(f"⏳ Map queued behind {self.render_pool.queue_depth + self.render_pool.active} other render(s)...")
+            data = await self.render_pool.render(func, points)
+            self.render_cache.put(key, data)
+
+        message = await ctx.send(
+            content=content,
+            file=discord.File(BytesIO(data), filename=filename)
+        )
+        if message.attachments:
+            self.render_cache.set_url(key, message.attachments[0].url)
     
+    def get_continent(self, country_name, country_code=None):
+        return self.countries.continent(country_code, country_name)
+
     @commands.command()
     @commands.has_permissions(administrator=True)
     async def setloc(self, ctx, member: discord.Member, *, location):
         """Set a user's location (Admin only)"""
         try:
-            loc = self.geolocator.geocode(location, addressdetails=True)
+            loc = await self.geocoder.geocode(location)
             if not loc:
                 await ctx.send("Location not found!")
                 return
                 
-            address = loc.raw.get('address', {})
-            data = load_json(LOCATIONS_FILE)
-            
-            data[str(member.id)] = {
-                "username": member.display_name,
-                "city": address.get('city', address.get('town', location)),
-                "country": address.get('country', "Unknown"),
-                "continent": self.get_continent(address.get('country', "Unknown")),
-                "lat": loc.latitude,
-                "lon": loc.longitude
-            }
-            save_json(LOCATIONS_FILE, data)
+            self.set_location(ctx.guild, member.id, {"username": member.display_name, **loc})
             await ctx.send(f"📍 Location set for {member.display_name}!")
         except GeocoderUnavailable:
             await ctx.send("Geocoding service unavailable. Try again later.")
@@ -53,152 +346,240 @@ class LocationManager(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def remloc(self, ctx, member: discord.Member):
         """Remove a user's location (Admin only)"""
-        data = load_json(LOCATIONS_FILE)
-        if str(member.id) in data:
-            del data[str(member.id)]
-            save_json(LOCATIONS_FILE, data)
+        if self.remove_location(ctx.guild, member.id):
             await ctx.send(f"❌ Location removed for {member.display_name}!")
         else:
             await ctx.send(f"⚠️ No location found for {member.display_name}.")
     
     @commands.command()
-    async def locations(self, ctx):
-        """Show all locations grouped by continent and country"""
-        data = load_json(LOCATIONS_FILE)
-        if not data:
+    async def locations(self, ctx, *, region: str = None):
+        """Show user locations page by page, optionally for one continent or country"""
+        continent = country = None
+        if region:
+            match = self.partition(ctx.guild).store.find_region(region)
+            if not match:
+                await ctx.send(f"No locations set in {region}!")
+                return
+            level, name = match
+            if level == "continent":
+                continent = name
+            else:
+                country = name
+
+        view = LocationPagesView(self.partitions, ctx.guild.id, ctx.author.id, continent, country)
+        embed = view.render()
+        if embed is None:
             await ctx.send("No locations set yet!")
             return
-
-        # Create nested structure: continent > country > cities > users
-        continent_map = {}
-        for user_id, loc in data.items():
-            user = await self.bot.fetch_user(int(user_id))
-            entry = {
-                "mention": f"<@{user_id}>",  # Create mention for clickable profile
-                "city": loc['city'],
-                "country": loc['country']
-            }
-            
-            # Initialize continent if not exists
-            continent_map.setdefault(loc['continent'], {})
-            
-            # Initialize country if not exists
-            country = loc['country']
-            continent_map[loc['continent']].setdefault(country, {})
-            
-            # Initialize city if not exists
-            city = loc['city']
-            continent_map[loc['continent']][country].setdefault(city, [])
-            
-            # Add user to city
-            continent_map[loc['continent']][country][city].append(entry)
-
-        # Build embed
-        embed = discord.Embed(title="User Locations", color=0x00ff00)
-        
-        for continent, countries in continent_map.items():
-            continent_text = []
-            
-            for country, cities in countries.items():
-                country_text = []
-                
-                for city, users in cities.items():
-                    user_list = ", ".join([u['mention'] for u in users])  # Use mention for clickable profiles
-                    country_text.append(f"**{city}**: {user_list}")
-                
-                country_entry = f"\n🌐 **{country}**\n" + "\n".join(country_text)
-                continent_text.append(country_entry)
-            
-            # Add a blank line after the continent's details
-            embed.add_field(
-                name=f"🌏 {continent}\u200b",
-                value="\n\n".join(continent_text) + "\n\u200b",  # Add invisible space after each continent
-                inline=False
-            )
-
-        await ctx.send(embed=embed)
+        view.message = await ctx.send(embed=embed, view=view if view.more else None)
     
     @commands.command()
-    async def map(self, ctx):
-        """Generate interactive OpenStreetMap"""
-        data = load_json(LOCATIONS_FILE)
-        if not data:
+    async def map(self, ctx, mode: str = None):
+        """Generate interactive OpenStreetMap, or a static image with `png`"""
+        if mode and mode.lower() != "png":
+            await ctx.send("Usage: `!map` or `!map png`")
+            return
+
+        partition = self.partition(ctx.guild)
+        if self.live_map and not mode:
+            # The live map reads the partition itself; nothing to render or upload
+            if not len(partition.columns):
+                await ctx.send("No locations set yet!")
+                return
+            await ctx.send(f"**User Locations Map** (always up to date): {self.live_map.url(ctx.guild.id)}")
+            return
+
+        if not len(partition.columns):
             await ctx.send("No locations set yet!")
             return
 
-        # Update username for each entry
-        for user_id in data:
-            try:
-                user = await self.bot.fetch_user(int(user_id))
-                data[user_id]['username'] = user.display_name
-            except:
-                data[user_id]['username'] = "Unknown User"
-        
-        # Create map and convert to bytes
-        m = create_location_map(data)
-        map_buffer = map_to_bytes(m)
+        if mode:
+            # The static map only draws coordinates, so usernames aren't needed
+            points = partition.columns.coordinates()
+            await self.send_map(ctx, render_location_png, points, "**User Locations Map**", "user_map.png")
+            return
+
+        # Label each marker with the user's current display name
+        names = await self.bot.user_resolver.display_names(partition.columns.rows, guild=ctx.guild)
         
-        await ctx.send(
-            content="**User Locations Map**\nDownload and open in browser:",
-            file=discord.File(map_buffer, filename="user_map.html")
+        # Render the map in a worker process, or reuse an identical render
+        await self.send_map(
+            ctx, render_location_map, partition.columns.points(names),
+            "**User Locations Map**\nDownload and open in browser:", "user_map.html"
         )
     
     @commands.command()
-    async def mapheat(self, ctx):
-        """Generate a heatmap of user locations"""
-        data = load_json(LOCATIONS_FILE)
-        if not data:
+    async def mapheat(self, ctx, mode: str = None):
+        """Generate a heatmap of user locations, or a static image with `png`"""
+        if mode and mode.lower() != "png":
+            await ctx.send("Usage: `!mapheat` or `!mapheat png`")
+            return
+
+        columns = self.partition(ctx.guild).columns
+        if not len(columns):
             await ctx.send("No locations set yet!")
             return
 
-        # Create heatmap and convert to bytes
-        m = create_heatmap(data)
-        map_buffer = map_to_bytes(m)
+        # Only coordinates affect the heatmap, so key it on lat/lon alone
+        points = columns.coordinates()
+        if mode:
+            await self.send_map(ctx, render_heatmap_png, points, "**User Locations Heatmap**", "heatmap.png")
+            return
 
-        # Send the map as a downloadable HTML file
-        await ctx.send(
-            content="**User Locations Heatmap**\nDownload and open in browser:",
-            file=discord.File(map_buffer, filename="heatmap.html")
+        await self.send_map(
+            ctx, render_heatmap, points,
+            "**User Locations Heatmap**\nDownload and open in browser:", "heatmap.html"
         )
     
     @commands.command()
     async def mysetloc(self, ctx, *, location):
         """Set your own location"""
         try:
-            loc = self.geolocator.geocode(location, addressdetails=True)
+            loc = await self.geocoder.geocode(location)
             if not loc:
                 await ctx.send("Location not found!")
                 return
 
-            address = loc.raw.get('address', {})
-            user_id = str(ctx.author.id)
-            data = load_json(LOCATIONS_FILE)
-
-            data[user_id] = {
-                "username": ctx.author.display_name,
-                "city": address.get('city', address.get('town', location)),
-                "country": address.get('country', "Unknown"),
-                "continent": self.get_continent(address.get('country', "Unknown")),
-                "lat": loc.latitude,
-                "lon": loc.longitude
-            }
-            save_json(LOCATIONS_FILE, data)
-            await ctx.send(f"📍 Your location has been set to {data[user_id]['city']}, {data[user_id]['country']}!")
+            self.set_location(ctx.guild, ctx.author.id, {"username": ctx.author.display_name, **loc})
+            await ctx.send(f"📍 Your location has been set to {loc['city']}, {loc['country']}!")
         except GeocoderUnavailable:
             await ctx.send("Geocoding service unavailable. Try again later.")
     
     @commands.command()
     async def myremoveloc(self, ctx):
         """Remove your own location"""
-        user_id = str(ctx.author.id)
-        data = load_json(LOCATIONS_FILE)
-
-        if user_id in data:
-            del data[user_id]
-            save_json(LOCATIONS_FILE, data)
+        if self.remove_location(ctx.guild, ctx.author.id):
             await ctx.send("📍 Your location has been removed.")
         else:
             await ctx.send("You don't have a location set.")
 
+    @commands.command()
+    async def nearby(self, ctx, km: float = NEARBY_DEFAULT_KM):
+        """Show users within a radius (in km) of your location"""
+        await self.send_nearby(ctx, ctx.author, km)
+
+    @commands.command()
+    async def near(self, ctx, member: discord.Member, km: float = NEARBY_DEFAULT_KM):
+        """Show users within a radius (in km) of another user's location"""
+        await self.send_nearby(ctx, member, km)
+
+    async def send_nearby(self, ctx, member, km):
+        if not 0 < km <= 20000:
+            await ctx.send("Radius must be between 0 and 20000 km.")
+            return
+
+        partition = self.partition(ctx.guild)
+        point = partition.columns.point(member.id)
+        if point is None:
+            who = "You don't" if member == ctx.author else f"{member.display_name} doesn't"
+            await ctx.send(f"{who} have a location set.")
+            return
+
+        results = [
+            (user_id, distance)
+            for user_id, distance in partition.spatial_index.query_radius(*point, km)
+            if user_id != str(member.id)
+        ]
+        if not results:
+            await ctx.send(f"No users within {km:g} km of {member.display_name}.")
+            return
+
+        lines = []
+        for user_id, distance in results[:NEARBY_LIMIT]:
+            loc = partition.columns.get(user_id)
+            lines.append(f"<@{user_id}> — {loc['city']}, {loc['country']} ({distance:.0f} km)")
+
+        embed = discord.Embed(
+            title=f"Users within {km:g} km of {member.display_name}",
+            description="\n".join(lines),
+            color=0x00ff00
+        )
+        if len(results) > NEARBY_LIMIT:
+            embed.set_footer(text=f"...and {len(results) - NEARBY_LIMIT} more")
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def locimport(self, ctx):
+        """Import locations from an attached CSV or NDJSON file (Admin only)"""
+        attachment = ctx.message.attachments[0] if ctx.message.attachments else None
+        fmt = detect_format(attachment.filename) if attachment else None
+        if not fmt:
+            await ctx.send(
+                "Attach a `.csv` (header row with `user_id` and `location`, or `lat`/`lon`) "
+                "or `.ndjson` file to `!locimport`."
+            )
+            return
+        if self.import_lock.locked():
+            await ctx.send("⚠️ An import is already running. Try again when it finishes.")
+            return
+
+        async with self.import_lock:
+            status = await ctx.send(f"📥 Importing locations from `{attachment.filename}`...")
+
+            def commit(batch):
+                for user_id, record in batch:
+                    if "username" not in record:
+                        member = ctx.guild.get_member(int(user_id))
+                        if member:
+                            record["username"] = member.display_name
+                self.set_locations(ctx.guild, batch)
+
+            async def progress(stats):
+                await status.edit(content=f"📥 Importing `{attachment.filename}`: {stats.summary()}")
+
+            importer = LocationImporter(
+                self.geocoder,
+                self.get_continent,
+                commit,
+                progress=progress,
+                concurrency=LOCATION_IMPORT_CONCURRENCY,
+                batch_size=LOCATION_IMPORT_BATCH_SIZE
+            )
+            try:
+                stats = await importer.run(parse_rows(stream_lines(attachment.url), fmt))
+            except aiohttp.ClientError:
+                await self.finish_status(ctx, status, f"❌ Could not download `{attachment.filename}`. "
+                                                      f"Imported so far: {importer.stats.summary()}")
+                return
+            except Exception:
+                await self.finish_status(ctx, status, f"❌ Import of `{attachment.filename}` failed. "
+                                                      f"Imported so far: {importer.stats.summary()}")
+                raise
+
+        content = f"✅ Import finished. {stats.summary()}"
+        if stats.examples:
+            content += "\n" + "\n".join(stats.examples)
+        await self.finish_status(ctx, status, content[:2000])
+
+    async def finish_status(self, ctx, status, content):
+        """Edit the import status message, or post anew if it was deleted"""
+        try:
+            await status.edit(content=content)
+        except discord.HTTPException:
+            await ctx.send(content)
+
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def locexport(self, ctx, fmt: str = "csv"):
+        """Export all locations as CSV or NDJSON (Admin only)"""
+        fmt = fmt.lower()
+        if fmt not in ("csv", "ndjson"):
+            await ctx.send("Usage: `!locexport [csv|ndjson]`")
+            return
+
+        # Rows are streamed from the store into a spooled file that only
+        # moves to disk once it grows past a few megabytes
+        with tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024) as fp:
+            count = write_export(self.partition(ctx.guild).store.iter_all(), fp, fmt)
+            if not count:
+                await ctx.send("No locations set yet!")
+                return
+            fp.seek(0)
+            await ctx.send(
+                content=f"📤 Exported {count} locations.",
+                file=discord.File(fp, filename=f"locations.{fmt}")
+            )
+
 async def setup(bot):
     await bot.add_cog(LocationManager(bot))
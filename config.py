@@ -11,10 +11,35 @@ PREFIX = os.getenv("COMMAND_PREFIX", "!")
 DATA_DIRECTORY = os.getenv("DATA_DIRECTORY", "./data")
 
 # Feature-specific configuration
-LOCATIONS_FILE = os.path.join(DATA_DIRECTORY, "locations.json")
-GAMES_FILE = os.path.join(DATA_DIRECTORY, "games.json")
+LOCATIONS_FILE = os.path.join(DATA_DIRECTORY, "locations.json")  # Legacy, migrated into LOCATIONS_DB
+LOCATIONS_DB = os.path.join(DATA_DIRECTORY, "locations.db")  # Legacy global store, copied into each guild's partition
+LOCATIONS_DIRECTORY = os.path.join(DATA_DIRECTORY, "locations")  # One <guild_id>.db per guild
+LOCATION_PARTITION_IDLE_SECONDS = int(os.getenv("LOCATION_PARTITION_IDLE_SECONDS", 900))
+GAMES_FILE = os.path.join(DATA_DIRECTORY, "games.json")  # Legacy, migrated into GAMES_DIRECTORY
+GAMES_DIRECTORY = os.path.join(DATA_DIRECTORY, "games")  # One <message_id>.json per open lobby
+LOBBY_EDIT_WINDOW = float(os.getenv("LOBBY_EDIT_WINDOW", 1.5))  # Seconds between edits of one lobby message
+LOBBY_ROLE_WINDOW = float(os.getenv("LOBBY_ROLE_WINDOW", 1.0))  # Seconds lobby role changes are batched for
 AUX_BATTLE_FILE = os.path.join(DATA_DIRECTORY, "aux_battle_data.json")
 GEOCODER_USER_AGENT = os.getenv("GEOCODER_USER_AGENT", "geo_bot")
+GEOCODER_URL = os.getenv("GEOCODER_URL", "https://nominatim.openstreetmap.org")
+GEOCODER_RATE = float(os.getenv("GEOCODER_RATE", 1.0))  # Requests per second
+GAZETTEER_INDEX = os.path.join(DATA_DIRECTORY, "gazetteer.idx")  # Built from assets/cities.tsv on startup
+GEOCODE_CACHE_FILE = os.path.join(DATA_DIRECTORY, "geocode_cache.json")
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 3600))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", 5000))
+MAP_RENDER_WORKERS = int(os.getenv("MAP_RENDER_WORKERS", 2))
+MAP_MAX_CONCURRENT_RENDERS = int(os.getenv("MAP_MAX_CONCURRENT_RENDERS", 2))
+RENDER_CACHE_DIRECTORY = os.path.join(DATA_DIRECTORY, "render_cache")
+RENDER_CACHE_MEMORY_BYTES = int(os.getenv("RENDER_CACHE_MEMORY_BYTES", 32 * 1024 * 1024))
+RENDER_CACHE_DISK_BYTES = int(os.getenv("RENDER_CACHE_DISK_BYTES", 256 * 1024 * 1024))
+NEARBY_DEFAULT_KM = float(os.getenv("NEARBY_DEFAULT_KM", 100))
+LIVE_MAP_ENABLED = os.getenv("LIVE_MAP_ENABLED", "false").lower() in ("1", "true", "yes")
+LIVE_MAP_HOST = os.getenv("LIVE_MAP_HOST", "0.0.0.0")
+LIVE_MAP_PORT = int(os.getenv("LIVE_MAP_PORT", 8080))
+LIVE_MAP_PUBLIC_URL = os.getenv("LIVE_MAP_PUBLIC_URL")  # Base URL of map links; required with LIVE_MAP_ENABLED
+LIVE_MAP_SECRET = os.getenv("LIVE_MAP_SECRET")  # Signs map links; random (links reset on restart) if unset
+LOCATION_IMPORT_CONCURRENCY = int(os.getenv("LOCATION_IMPORT_CONCURRENCY", 8))
+LOCATION_IMPORT_BATCH_SIZE = int(os.getenv("LOCATION_IMPORT_BATCH_SIZE", 500))
 
 # Ensure data directory exists
 os.makedirs(DATA_DIRECTORY, exist_ok=True)
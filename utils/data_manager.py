@@ -1,20 +1,239 @@
 # utils/data_manager.py
+import asyncio
 import json
 import os
+import tempfile
+from types import MappingProxyType
+
+# Seconds between a save and the flush that writes it. Saves made in the
+# meantime are coalesced so each file is rewritten at most once per interval.
+FLUSH_INTERVAL = float(os.getenv("DATA_FLUSH_INTERVAL", 2.0))
+
+_pending = {}
+# Queued in _pending by delete_json in place of data
+_DELETED = object()
+# Payloads taken from _pending whose write hasn't landed yet: path -> (payload, version)
+_inflight = {}
+_flush_task = None
+_flush_lock = None
+
+# Read cache: file path -> (write version, mtime_ns, size, read-only data).
+# save_json bumps the write version; the mtime/size check catches edits made
+# to the file outside of this module.
+_versions = {}
+_cache = {}
+_cache_stats = {"hits": 0, "misses": 0}
+
+def freeze(obj):
+    """Return a read-only view of parsed JSON data"""
+    if isinstance(obj, dict):
+        return MappingProxyType({key: freeze(value) for key, value in obj.items()})
+    if isinstance(obj, list):
+        return tuple(freeze(value) for value in obj)
+    return obj
+
+def thaw(obj):
+    """Return a mutable copy of data returned by load_json"""
+    if isinstance(obj, (dict, MappingProxyType)):
+        return {key: thaw(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(value) for value in obj]
+    return obj
+
+def cache_stats():
+    """Return read cache hit/miss counters"""
+    return {"entries": len(_cache), **_cache_stats}
 
 def save_json(file_path, data):
-    """Save data to a JSON file"""
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, 'w') as f:
-        json.dump(data, f)
+    """Queue data to be written to a JSON file
+
+    Inside the event loop the write is deferred and batched with other saves
+    made during the flush interval; outside of it the file is written
+    immediately. Files are always replaced atomically. data is snapshotted
+    here, so changing it afterwards doesn't alter what gets written.
+    """
+    _queue(file_path, freeze(data))
+
+def delete_json(file_path):
+    """Queue a JSON file to be removed, in order with saves to the same path"""
+    _queue(file_path, _DELETED)
+
+def _queue(file_path, data):
+    global _flush_task
+    _pending[file_path] = data
+    _versions[file_path] = _versions.get(file_path, 0) + 1
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush()
+        return
+    if _flush_task is None:
+        _flush_task = loop.create_task(_flush_later())
+
+def _deleted(file_path):
+    """True if the newest queued or in-flight change to file_path removes it"""
+    if file_path in _pending:
+        return _pending[file_path] is _DELETED
+    return file_path in _inflight and _inflight[file_path][0] is None
 
 def load_json(file_path, default=None):
-    """Load data from a JSON file"""
-    if default is None:
-        default = {}
+    """Load data from a JSON file as a read-only view
+
+    The parsed data is cached and shared between callers until the file is
+    saved again or changes on disk. Use thaw() to get a mutable copy.
+    """
+    version = _versions.get(file_path, 0)
+    cached = _cache.get(file_path)
+
+    if _deleted(file_path):
+        return freeze({} if default is None else default)
+
+    if file_path in _pending:
+        if cached and cached[0] == version:
+            _cache_stats["hits"] += 1
+            return cached[3]
+        _cache_stats["misses"] += 1
+        data = _pending[file_path]
+        _cache[file_path] = (version, None, None, data)
+        return data
+
+    if file_path in _inflight:
+        # The file on disk is older than this payload until the write lands
+        if cached and cached[0] == version:
+            _cache_stats["hits"] += 1
+            return cached[3]
+        _cache_stats["misses"] += 1
+        data = freeze(json.loads(_inflight[file_path][0]))
+        _cache[file_path] = (version, None, None, data)
+        return data
+
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return freeze({} if default is None else default)
+
+    if cached and cached[:3] == (version, stat.st_mtime_ns, stat.st_size):
+        _cache_stats["hits"] += 1
+        return cached[3]
+
+    _cache_stats["misses"] += 1
+    with open(file_path) as f:
+        data = freeze(json.load(f))
+    _cache[file_path] = (version, stat.st_mtime_ns, stat.st_size, data)
+    return data
+
+def read_json(file_path, default=None):
+    """Parse a JSON file into fresh mutable data, bypassing the read cache
+
+    For one-off loads of large files (such as restoring state at startup),
+    where freezing and caching the result would only add work.
+    """
+    if _deleted(file_path):
+        return {} if default is None else default
+    if file_path in _pending:
+        return thaw(_pending[file_path])
+    if file_path in _inflight:
+        return json.loads(_inflight[file_path][0])
     try:
         with open(file_path) as f:
             return json.load(f)
     except FileNotFoundError:
-        return default
+        return {} if default is None else default
+
+def flush():
+    """Write every pending save to disk now (used at shutdown)"""
+    batch = _take_pending()
+    try:
+        _write_batch(batch)
+        _mark_written(batch)
+    finally:
+        _drop_inflight(batch)
+
+async def flush_async():
+    """Write every pending save to disk from an executor"""
+    global _flush_lock
+    if _flush_lock is None:
+        _flush_lock = asyncio.Lock()
+    # Serialize flushes so an older payload can never land after a newer one
+    async with _flush_lock:
+        batch = _take_pending()
+        if batch:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, _write_batch, batch)
+                _mark_written(batch)
+            finally:
+                _drop_inflight(batch)
+
+async def _flush_later():
+    global _flush_task
+    try:
+        await asyncio.sleep(FLUSH_INTERVAL)
+    finally:
+        _flush_task = None
+    try:
+        await flush_async()
+    except Exception as e:
+        print(f"Error flushing data: {e}")
+
+def _take_pending():
+    # Pending data is frozen by save_json, so what is dumped is what was saved
+    batch = {
+        path: (None if data is _DELETED else json.dumps(data, default=thaw).encode(), _versions.get(path, 0))
+        for path, data in _pending.items()
+    }
+    _pending.clear()
+    _inflight.update(batch)
+    return batch
+
+def _write_batch(batch):
+    for file_path, (payload, _) in batch.items():
+        if payload is None:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+        else:
+            _write_atomic(file_path, payload)
+
+def _mark_written(batch):
+    # Keep cached reads of what was just written valid against the new mtime.
+    # Only entries built from the pending or in-flight payload (no mtime yet)
+    # hold exactly what was written; anything read from disk is older.
+    for file_path, (payload, version) in batch.items():
+        if payload is None:
+            _cache.pop(file_path, None)
+            continue
+        cached = _cache.get(file_path)
+        if cached and cached[0] == version and cached[1] is None and file_path not in _pending:
+            stat = os.stat(file_path)
+            _cache[file_path] = (version, stat.st_mtime_ns, stat.st_size, cached[3])
+
+def _drop_inflight(batch):
+    for file_path, entry in batch.items():
+        if _inflight.get(file_path) is entry:
+            del _inflight[file_path]
+
+def _write_atomic(file_path, payload):
+    """Write via a temp file, fsync and rename so readers never see a partial file"""
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if os.name == "posix":
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
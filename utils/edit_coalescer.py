@@ -0,0 +1,59 @@
+# utils/edit_coalescer.py
+import asyncio
+
+import discord
+
+
+class EditCoalescer:
+    """Debounced embed edits for messages that change in bursts
+
+    mark() records that a message needs re-rendering. The first change is
+    sent right away; changes arriving within window seconds of an edit are
+    folded into one follow-up edit rendered from the latest state. Edits go
+    through a PartialMessage, so no fetch is needed, and are skipped when the
+    rendered embed equals the last one sent.
+    """
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self._dirty = {}
+        self._tasks = {}
+        self._last_edit = {}
+        self._sent = {}
+
+    def mark(self, key, channel, message_id, render):
+        """Schedule an edit of message_id to the embed returned by render()"""
+        self._dirty[key] = (channel, message_id, render)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.get_running_loop().create_task(self._run(key))
+
+    def forget(self, key):
+        """Drop any pending edit and remembered state for key"""
+        self._dirty.pop(key, None)
+        self._last_edit.pop(key, None)
+        self._sent.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task:
+            task.cancel()
+
+    async def _run(self, key):
+        loop = asyncio.get_running_loop()
+        try:
+            while key in self._dirty:
+                delay = self._last_edit.get(key, float("-inf")) + self.window - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                channel, message_id, render = self._dirty.pop(key)
+                embed = render()
+                rendered = embed.to_dict()
+                if rendered == self._sent.get(key):
+                    continue
+                self._last_edit[key] = loop.time()
+                try:
+                    await channel.get_partial_message(message_id).edit(embed=embed)
+                    self._sent[key] = rendered
+                except discord.HTTPException as e:
+                    print(f"Error updating embed: {e}")
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
@@ -0,0 +1,262 @@
+# utils/gazetteer.py
+import bisect
+import difflib
+import mmap
+import os
+import struct
+import unicodedata
+
+ASSETS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+CITIES_FILE = os.path.join(ASSETS_DIRECTORY, "cities.tsv")
+COUNTRIES_FILE = os.path.join(ASSETS_DIRECTORY, "countries.tsv")
+REGIONS_FILE = os.path.join(ASSETS_DIRECTORY, "regions.tsv")
+
+# Index file layout: header, fixed-size records sorted by normalized name, then
+# a UTF-8 string blob holding the normalized keys and display names.
+MAGIC = b"GAZ2"
+HEADER = struct.Struct("<4sII")            # magic, record count, string blob offset
+RECORD = struct.Struct("<IHIHffI2s")       # key offset/len, name offset/len, lat, lon, population, country code
+
+# Minimum difflib ratio for a fuzzy match to be accepted
+FUZZY_CUTOFF = 0.85
+# A fuzzy match is ambiguous if another name scores within this of it
+FUZZY_MARGIN = 0.1
+# An exact match loses to the network geocoder when a city it is a prefix
+# of ("San" -> "San Antonio") is this many times more populous
+PREFIX_DOMINANCE = 10
+
+# Abbreviations spelled out so "St. Petersburg" and "Saint Petersburg" share a key
+ABBREVIATIONS = {"st": "saint", "ste": "sainte", "mt": "mount", "ft": "fort"}
+
+def normalize(text):
+    """Casefold, strip accents and punctuation: "São Paulo" -> "sao paulo" """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c if c.isalnum() else " " for c in text if not unicodedata.combining(c))
+    return " ".join(ABBREVIATIONS.get(word, word) for word in text.split())
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _read_tsv(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                yield line.rstrip("\n").split("\t")
+
+
+class CountryTable:
+    """Precomputed country code -> (name, continent) table"""
+
+    def __init__(self, path=COUNTRIES_FILE):
+        self.by_code = {}
+        self.by_name = {}
+        for code, name, continent in _read_tsv(path):
+            self.by_code[code] = (name, continent)
+            self.by_name[normalize(name)] = code
+
+    def code_for(self, name):
+        return self.by_name.get(normalize(name))
+
+    def name(self, code):
+        entry = self.by_code.get(code.upper())
+        return entry[0] if entry else None
+
+    def continent(self, country_code=None, country_name=None):
+        """Return the continent for a country code or English name"""
+        if not country_code and country_name:
+            country_code = self.code_for(country_name)
+        entry = self.by_code.get(country_code.upper()) if country_code else None
+        return entry[1] if entry else "Unknown"
+
+
+def build_index(source_path, index_path):
+    """Compile the cities TSV into the binary index read by Gazetteer"""
+    entries = []
+    for name, country_code, lat, lon, population in _read_tsv(source_path):
+        entries.append((normalize(name), -int(population), name, country_code, float(lat), float(lon)))
+    entries.sort()
+
+    blob = bytearray()
+    records = bytearray()
+    for key, neg_population, name, country_code, lat, lon in entries:
+        key_bytes, name_bytes = key.encode(), name.encode()
+        key_offset = len(blob)
+        blob += key_bytes
+        name_offset = len(blob)
+        blob += name_bytes
+        records += RECORD.pack(
+            key_offset, len(key_bytes), name_offset, len(name_bytes),
+            lat, lon, -neg_population, country_code.encode()
+        )
+
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entries), HEADER.size + len(records)))
+        f.write(records)
+        f.write(blob)
+    os.replace(tmp_path, index_path)
+
+
+class Gazetteer:
+    """Offline city lookup over a memory-mapped index
+
+    Records are sorted by normalized name, so exact and prefix lookups are a
+    binary search over the mapped file. Misspelled names fall back to a
+    trigram index built on first use. Among equal matches the most populous
+    city wins; a trailing ", <country>" narrows the search to that country.
+
+    Only confident answers are returned. An exact name is used unless it is
+    also the start of far bigger cities ("San"). Whole-word prefixes and
+    misspellings must match a single name. Anything else returns None and
+    is left to the network geocoder.
+    """
+
+    def __init__(self, index_path, source_path=CITIES_FILE, countries=None, regions_path=REGIONS_FILE):
+        if not _index_current(index_path, source_path):
+            build_index(source_path, index_path)
+
+        self.countries = countries or CountryTable()
+        # Country and region names ("Virginia", "Jamaica") are left to the
+        # network geocoder rather than matched to a same-named city
+        self.reserved = set(self.countries.by_name)
+        self.reserved.update(normalize(name) for name, _ in _read_tsv(regions_path))
+        self._file = open(index_path, "rb")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.blob_offset = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{index_path} is not a gazetteer index")
+        self._keys = _KeyView(self)
+        self._trigrams = None
+
+    def close(self):
+        self.data.close()
+        self._file.close()
+
+    def lookup(self, query):
+        """Resolve a place name to a location record, or None"""
+        key, country_code = self._parse(query)
+        if not key or key in self.reserved:
+            return None
+
+        exact = self._best(self._exact(key), country_code)
+        prefixed = self._best(self._prefix(key), country_code)
+        if exact is not None:
+            if prefixed is not None and self._population(prefixed) >= PREFIX_DOMINANCE * self._population(exact):
+                return None
+            return self._result(exact)
+
+        index = self._unique(self._prefix(key), country_code)
+        if index is None:
+            index = self._unique(self._fuzzy(key), country_code)
+        return None if index is None else self._result(index)
+
+    def _parse(self, query):
+        # "Berlin, DE" / "Waterloo, Ontario, Canada" -> search for the city within that country
+        parts = [part.strip() for part in query.split(",")]
+        if len(parts) > 1 and parts[-1]:
+            qualifier = parts[-1]
+            code = qualifier.upper() if self.countries.name(qualifier) else self.countries.code_for(qualifier)
+            if code:
+                return normalize(parts[0]), code
+        return normalize(query), None
+
+    def _record(self, index):
+        return RECORD.unpack_from(self.data, HEADER.size + index * RECORD.size)
+
+    def _key(self, index):
+        key_offset, key_len = self._record(index)[:2]
+        start = self.blob_offset + key_offset
+        return self.data[start:start + key_len].decode()
+
+    def _exact(self, key):
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_right(self._keys, key)
+        return range(start, end)
+
+    def _prefix(self, key):
+        # Only whole-word prefixes: "frankfurt" matches "frankfurt am main"
+        key += " "
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key[:-1] + "!")
+        return range(start, end)
+
+    def _fuzzy(self, key):
+        if len(key) < 4:
+            return []
+        if self._trigrams is None:
+            self._trigrams = {}
+            for index in range(self.count):
+                for gram in trigrams(self._key(index)):
+                    self._trigrams.setdefault(gram, []).append(index)
+
+        scores = {}
+        for gram in trigrams(key):
+            for index in self._trigrams.get(gram, ()):
+                scores[index] = scores.get(index, 0) + 1
+
+        candidates = sorted(scores, key=scores.get, reverse=True)[:50]
+        ratios = {index: difflib.SequenceMatcher(None, key, self._key(index)).ratio() for index in candidates}
+        best_ratio = max(ratios.values(), default=0)
+        if best_ratio < FUZZY_CUTOFF:
+            return []
+        # Near misses are returned too, so _unique can see "Tokio" is both Toki and Tokyo
+        return [index for index, ratio in ratios.items() if ratio >= best_ratio - FUZZY_MARGIN]
+
+    def _best(self, indexes, country_code):
+        """Pick the most populous match, optionally restricted to a country"""
+        best = None
+        best_population = -1
+        for index in indexes:
+            record = self._record(index)
+            if country_code and record[7].decode() != country_code:
+                continue
+            if record[6] > best_population:
+                best, best_population = index, record[6]
+        return best
+
+    def _unique(self, indexes, country_code):
+        """The most populous match if all matches share one name, else None"""
+        indexes = [
+            index for index in indexes
+            if not country_code or self._record(index)[7].decode() == country_code
+        ]
+        if len({self._key(index) for index in indexes}) != 1:
+            return None
+        return self._best(indexes, None)
+
+    def _population(self, index):
+        return self._record(index)[6]
+
+    def _result(self, index):
+        _, _, name_offset, name_len, lat, lon, _, country_code = self._record(index)
+        start = self.blob_offset + name_offset
+        country_code = country_code.decode()
+        return {
+            "city": self.data[start:start + name_len].decode(),
+            "country": self.countries.name(country_code) or "Unknown",
+            "continent": self.countries.continent(country_code),
+            "lat": round(lat, 4),
+            "lon": round(lon, 4)
+        }
+
+
+def _index_current(index_path, source_path):
+    """True if index_path exists, is newer than the source and has this layout"""
+    if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(source_path):
+        return False
+    with open(index_path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class _KeyView:
+    """Sequence of normalized keys backed by the mapped file, for bisect"""
+
+    def __init__(self, gazetteer):
+        self.gazetteer = gazetteer
+
+    def __len__(self):
+        return self.gazetteer.count
+
+    def __getitem__(self, index):
+        return self.gazetteer._key(index)
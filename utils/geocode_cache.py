@@ -0,0 +1,70 @@
+# utils/geocode_cache.py
+import time
+from collections import OrderedDict
+
+from utils.data_manager import save_json, load_json, thaw
+
+
+def normalize_query(query):
+    """Normalize a location query so equivalent spellings share a cache entry"""
+    return " ".join(query.casefold().replace(",", " , ").split()).replace(" ,", ",")
+
+
+class GeocodeCache:
+    """On-disk LRU cache of resolved locations with a TTL
+
+    Entries are kept in least-recently-used order and persisted as JSON, so the
+    order survives restarts. Each entry holds the resolved city, country,
+    continent and coordinates plus the time it was stored.
+    """
+
+    def __init__(self, file_path, ttl=30 * 24 * 3600, max_entries=5000):
+        self.file_path = file_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict(thaw(load_json(file_path)))
+        self._evict()
+
+    def get(self, query):
+        """Return the cached result for a query, or None on a miss"""
+        key = normalize_query(query)
+        entry = self.entries.get(key)
+        if entry is None or time.time() - entry["ts"] > self.ttl:
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry["result"])
+
+    def put(self, query, result):
+        """Store a resolved location and persist the cache"""
+        key = normalize_query(query)
+        self.entries[key] = {"result": dict(result), "ts": time.time()}
+        self.entries.move_to_end(key)
+        self._evict()
+        self.save()
+
+    def save(self):
+        save_json(self.file_path, self.entries)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _evict(self):
+        # Drop expired entries first, then the least recently used ones
+        now = time.time()
+        for key in [k for k, e in self.entries.items() if now - e["ts"] > self.ttl]:
+            del self.entries[key]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
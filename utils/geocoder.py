@@ -0,0 +1,115 @@
+# utils/geocoder.py
+import asyncio
+import time
+
+import aiohttp
+
+from utils.geocode_cache import normalize_query
+
+
+class GeocoderUnavailable(Exception):
+    """Raised when the upstream geocoder cannot be reached"""
+
+
+class TokenBucket:
+    """Async token bucket limiting how often upstream requests are made"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class GeocodingService:
+    """Non-blocking geocoder backed by the Nominatim HTTP API
+
+    Queries are answered from the optional GeocodeCache or offline Gazetteer
+    when possible. Remaining lookups go through a shared aiohttp session, are
+    limited by a token bucket (Nominatim allows one request per second) and
+    concurrent requests for the same query share a single upstream call.
+    """
+
+    def __init__(self, base_url, user_agent, get_continent, cache=None, gazetteer=None, rate=1.0, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.user_agent = user_agent
+        self.get_continent = get_continent
+        self.cache = cache
+        self.gazetteer = gazetteer
+        self.bucket = TokenBucket(rate)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session = None
+        self._inflight = {}
+
+    async def geocode(self, location):
+        """Resolve a location string to a location record, or None if not found"""
+        if self.cache:
+            cached = self.cache.get(location)
+            if cached:
+                return cached
+
+        if self.gazetteer:
+            local = self.gazetteer.lookup(location)
+            if local:
+                return local
+
+        key = normalize_query(location)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._lookup(location))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def _lookup(self, location):
+        raw = await self._request(location)
+        if not raw:
+            return None
+
+        address = raw.get('address', {})
+        result = {
+            "city": address.get('city', address.get('town', location)),
+            "country": address.get('country', "Unknown"),
+            "continent": self.get_continent(address.get('country', "Unknown"), address.get('country_code')),
+            "lat": float(raw['lat']),
+            "lon": float(raw['lon'])
+        }
+        if self.cache:
+            self.cache.put(location, result)
+        return result
+
+    async def _request(self, location):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                headers={"User-Agent": self.user_agent},
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=4)
+            )
+
+        await self.bucket.acquire()
+        params = {"q": location, "format": "json", "addressdetails": 1, "limit": 1}
+        try:
+            async with self.session.get(f"{self.base_url}/search", params=params) as resp:
+                if resp.status != 200:
+                    raise GeocoderUnavailable(f"Geocoder returned HTTP {resp.status}")
+                results = await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise GeocoderUnavailable(str(e)) from e
+        return results[0] if results else None
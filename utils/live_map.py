@@ -0,0 +1,95 @@
+# utils/live_map.py
+import hashlib
+import hmac
+import secrets
+
+from aiohttp import web
+
+from utils.map_generator import create_geojson_map, geojson_dumps, geojson_points
+
+# Random per start-up, so every restart serves fresh ETags
+_INSTANCE = secrets.token_hex(4)
+
+
+class LiveMapServer:
+    """Small aiohttp server on the bot's event loop serving live location maps
+
+    Each guild gets a map page plus /points.geojson read straight from its
+    location partition. Responses carry an ETag derived from the partition
+    version, so unchanged data costs a 304 and the GeoJSON is serialized at
+    most once per change from the partition's in-memory columns. URLs
+    include an HMAC token so guild data is only reachable through links the
+    bot hands out.
+    """
+
+    def __init__(self, partitions, host, port, public_url, secret=None):
+        self.partitions = partitions
+        self.host = host
+        self.port = port
+        self.public_url = public_url.rstrip("/")
+        # Without a configured secret, links stay valid until the bot restarts
+        self.secret = (secret or secrets.token_hex(32)).encode()
+        self.page = create_geojson_map(data_url="points.geojson").encode()
+        self.runner = None
+        self._bodies = {}
+
+        self.app = web.Application()
+        self.app.router.add_get("/map/{guild_id}/{token}/", self.handle_page)
+        self.app.router.add_get("/map/{guild_id}/{token}/points.geojson", self.handle_points)
+
+    def token(self, guild_id):
+        return hmac.new(self.secret, str(guild_id).encode(), hashlib.sha256).hexdigest()[:24]
+
+    def url(self, guild_id):
+        """Public link to a guild's live map"""
+        return f"{self.public_url}/map/{guild_id}/{self.token(guild_id)}/"
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def _guild_id(self, request):
+        guild_id = request.match_info["guild_id"]
+        if not guild_id.isdigit() or not hmac.compare_digest(request.match_info["token"], self.token(guild_id)):
+            raise web.HTTPNotFound()
+        return int(guild_id)
+
+    def _not_modified(self, request, etag):
+        return etag in request.headers.get("If-None-Match", "")
+
+    async def handle_page(self, request):
+        self._guild_id(request)
+        etag = f'"page-{_INSTANCE}"'
+        if self._not_modified(request, etag):
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            body=self.page, content_type="text/html", charset="utf-8",
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+
+    async def handle_points(self, request):
+        partition = self.partitions.get(self._guild_id(request))
+        etag = f'"{_INSTANCE}-{partition.version}"'
+        if self._not_modified(request, etag):
+            return web.Response(status=304, headers={"ETag": etag})
+
+        cached = self._bodies.get(partition.guild_id)
+        if cached is None or cached[0] != partition.version:
+            # Forget bodies of partitions that have been evicted meanwhile
+            for guild_id in [guild_id for guild_id in self._bodies if guild_id not in self.partitions.partitions]:
+                del self._bodies[guild_id]
+            points = partition.columns.points()
+            cached = self._bodies[partition.guild_id] = (partition.version, geojson_dumps(geojson_points(points)).encode())
+
+        response = web.Response(
+            body=cached[1], content_type="application/geo+json", charset="utf-8",
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+        response.enable_compression()
+        return response
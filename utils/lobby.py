@@ -0,0 +1,349 @@
+# utils/lobby.py
+import asyncio
+from enum import Enum
+
+from discord import SelectOption
+
+# Slots per page of the slot picker (Discord allows 25 options per select)
+PAGE_SIZE = 20
+
+class Claim(Enum):
+    """Outcome of claiming a slot position"""
+    OK = "ok"
+    INVALID_SLOT = "invalid_slot"
+    ALREADY_IN_LOBBY = "already_in_lobby"
+    ALREADY_PLAYING = "already_playing"
+    ALREADY_SPONSORING = "already_sponsoring"
+    SLOT_TAKEN = "slot_taken"
+    NO_PLAYER = "no_player"
+
+def _slots_in(bits):
+    """Yield the slot numbers of the set bits, lowest first (bit 0 = slot 1)"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length()
+        bits ^= low
+
+
+class GameSign:
+    """State of one game lobby
+
+    Slots are numbered from 1. Players and sponsors are kept in two lists,
+    with bitsets of the slots that are free for a player and open for a
+    sponsor (taken by a player, not yet sponsored), and user id -> slot
+    indexes per role. Membership checks are dict lookups and the slot picker
+    only walks free slots; its option pages are cached until the lobby
+    changes. All changes go through the methods below so the indexes stay
+    consistent.
+
+    Interaction handlers change a lobby inside "async with game.lock" with
+    claim_player/claim_sponsor/release, and only talk to Discord after the
+    lock is released, so concurrent clicks are applied one at a time.
+
+    A lobby is identified by its message id.
+    """
+
+    __slots__ = (
+        "max_slots", "host_id", "message_id", "hostname", "game_name", "role_name",
+        "channel_id", "role_id", "players", "sponsors", "free_players",
+        "free_sponsors", "player_slots", "sponsor_slots", "version", "lock",
+        "registry", "_options"
+    )
+
+    def __init__(self, max_slots, host_id, message_id, hostname, game_name, role_name, channel_id=None):
+        self.max_slots = max_slots
+        self.host_id = host_id
+        self.message_id = message_id
+        self.hostname = hostname
+        self.game_name = game_name
+        self.role_name = role_name
+        self.channel_id = channel_id
+        # Id of the resolved role, so it is only looked up by name once
+        self.role_id = None
+        self.players = [None] * max_slots
+        self.sponsors = [None] * max_slots
+        self.free_players = (1 << max_slots) - 1
+        self.free_sponsors = 0
+        self.player_slots = {}
+        self.sponsor_slots = {}
+        self.version = 0
+        self.lock = asyncio.Lock()
+        # LobbyRegistry this lobby is in, told about members joining and leaving
+        self.registry = None
+        self._options = {}
+
+    def slot(self, num):
+        """Return (player_id, sponsor_id) of a slot"""
+        return self.players[num - 1], self.sponsors[num - 1]
+
+    def iter_slots(self):
+        """Yield (slot, player_id, sponsor_id) for every slot"""
+        for index in range(self.max_slots):
+            yield index + 1, self.players[index], self.sponsors[index]
+
+    def is_member(self, user_id):
+        return user_id in self.player_slots or user_id in self.sponsor_slots
+
+    def player_slot(self, user_id):
+        return self.player_slots.get(user_id)
+
+    def sponsor_slot(self, user_id):
+        return self.sponsor_slots.get(user_id)
+
+    def has_free_player_slot(self):
+        return self.free_players != 0
+
+    def has_free_sponsor_slot(self):
+        return self.free_sponsors != 0
+
+    def claim_player(self, num, user_id, exclusive=True):
+        """Take a free player slot; exclusive also refuses users sponsoring a slot"""
+        if not 1 <= num <= self.max_slots:
+            return Claim.INVALID_SLOT
+        if exclusive and self.is_member(user_id):
+            return Claim.ALREADY_IN_LOBBY
+        if user_id in self.player_slots:
+            return Claim.ALREADY_PLAYING
+        if self.players[num - 1] is not None:
+            return Claim.SLOT_TAKEN
+        self.set_player(num, user_id)
+        return Claim.OK
+
+    def claim_sponsor(self, num, user_id):
+        """Sponsor a slot that has a player and no sponsor yet"""
+        if not 1 <= num <= self.max_slots:
+            return Claim.INVALID_SLOT
+        if user_id in self.sponsor_slots:
+            return Claim.ALREADY_SPONSORING
+        if self.sponsors[num - 1] is not None:
+            return Claim.SLOT_TAKEN
+        if self.players[num - 1] is None:
+            return Claim.NO_PLAYER
+        self.set_sponsor(num, user_id)
+        return Claim.OK
+
+    def set_player(self, num, user_id):
+        """Put a player into a free slot; returns False if it is taken or they already play"""
+        bit = 1 << (num - 1)
+        if not self.free_players & bit or user_id in self.player_slots:
+            return False
+        self.players[num - 1] = user_id
+        self.player_slots[user_id] = num
+        self.free_players &= ~bit
+        if self.sponsors[num - 1] is None:
+            self.free_sponsors |= bit
+        self._changed(user_id)
+        return True
+
+    def set_sponsor(self, num, user_id):
+        """Sponsor a slot that has a player; returns False if not possible"""
+        bit = 1 << (num - 1)
+        if not self.free_sponsors & bit or user_id in self.sponsor_slots:
+            return False
+        self.sponsors[num - 1] = user_id
+        self.sponsor_slots[user_id] = num
+        self.free_sponsors &= ~bit
+        self._changed(user_id)
+        return True
+
+    def remove_player(self, num):
+        """Empty a slot's player position, returning the removed user id"""
+        user_id = self.players[num - 1]
+        if user_id is not None:
+            bit = 1 << (num - 1)
+            self.players[num - 1] = None
+            del self.player_slots[user_id]
+            self.free_players |= bit
+            self.free_sponsors &= ~bit
+            self._changed(user_id)
+        return user_id
+
+    def remove_sponsor(self, num):
+        """Empty a slot's sponsor position, returning the removed user id"""
+        user_id = self.sponsors[num - 1]
+        if user_id is not None:
+            self.sponsors[num - 1] = None
+            del self.sponsor_slots[user_id]
+            if self.players[num - 1] is not None:
+                self.free_sponsors |= 1 << (num - 1)
+            self._changed(user_id)
+        return user_id
+
+    def clear_slot(self, num):
+        """Remove both player and sponsor of a slot, returning (player_id, sponsor_id)"""
+        return self.remove_player(num), self.remove_sponsor(num)
+
+    def release(self, user_id):
+        """Remove a user from every position they hold, returning [(slot, role)]"""
+        removed = []
+        num = self.player_slots.get(user_id)
+        if num is not None:
+            self.remove_player(num)
+            removed.append((num, "player"))
+        num = self.sponsor_slots.get(user_id)
+        if num is not None:
+            self.remove_sponsor(num)
+            removed.append((num, "sponsor"))
+        return removed
+
+    def player_pages(self):
+        """SelectOption pages of slots free for a player (cached per version)"""
+        return self._pages("player", self.free_players)
+
+    def sponsor_pages(self):
+        """SelectOption pages of slots open for a sponsor (cached per version)"""
+        return self._pages("sponsor", self.free_sponsors)
+
+    def _pages(self, role, bits):
+        cached = self._options.get(role)
+        if cached and cached[0] == self.version:
+            return cached[1]
+        options = [SelectOption(label=f"Slot {num}", value=str(num)) for num in _slots_in(bits)]
+        pages = [options[i:i + PAGE_SIZE] for i in range(0, len(options), PAGE_SIZE)]
+        self._options[role] = (self.version, pages)
+        return pages
+
+    def _changed(self, user_id):
+        self.version += 1
+        if self.registry is not None:
+            self.registry.index_member(self, user_id)
+
+    def members(self):
+        """Ids of everyone holding a position in the lobby"""
+        return self.player_slots.keys() | self.sponsor_slots.keys()
+
+    def to_dict(self):
+        return {
+            "max_slots": self.max_slots,
+            "host_id": self.host_id,
+            "message_id": self.message_id,
+            "hostname": self.hostname,
+            "game_name": self.game_name,
+            "role_name": self.role_name,
+            "channel_id": self.channel_id,
+            "role_id": self.role_id,
+            "slots": {
+                str(num): {"player": player, "sponsor": sponsor}
+                for num, player, sponsor in self.iter_slots()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a saved lobby, including the older schema that
+        stored the player as "user" and had no name or channel fields"""
+        game = cls(
+            int(data["max_slots"]),
+            int(data["host_id"]),
+            int(data["message_id"]),
+            data.get("hostname") or f"<@{data['host_id']}>",
+            data.get("game_name") or "Game",
+            data.get("role_name")
+        )
+        game.channel_id = data.get("channel_id")
+        game.role_id = data.get("role_id")
+        for key, slot in data.get("slots", {}).items():
+            num = int(key)
+            if not 1 <= num <= game.max_slots:
+                continue
+            player = slot.get("player", slot.get("user"))
+            sponsor = slot.get("sponsor")
+            if player:
+                game.set_player(num, str(player))
+            if sponsor and str(sponsor) not in game.sponsor_slots:
+                # Sponsors stay when their player leaves, so this can't use set_sponsor
+                game.sponsors[num - 1] = str(sponsor)
+                game.sponsor_slots[str(sponsor)] = num
+                game.free_sponsors &= ~(1 << (num - 1))
+        game.version = 0
+        return game
+
+
+class LobbyRegistry:
+    """Open lobbies by message id, with indexes by channel, name, host and member
+
+    Every index maps to the set of message ids it matches, so finding a
+    lobby by name or the lobbies a user is in does not scan every lobby.
+    Lobbies report their own membership changes through index_member while
+    they are registered.
+    """
+
+    def __init__(self):
+        self.lobbies = {}
+        self.by_channel = {}
+        self.by_name = {}
+        self.by_host = {}
+        self.by_member = {}
+
+    def __len__(self):
+        return len(self.lobbies)
+
+    def __contains__(self, message_id):
+        return message_id in self.lobbies
+
+    def get(self, message_id):
+        return self.lobbies.get(message_id)
+
+    def items(self):
+        return self.lobbies.items()
+
+    def add(self, game):
+        """Register a lobby under its message id"""
+        key = game.message_id
+        self.lobbies[key] = game
+        if game.channel_id is not None:
+            self.by_channel.setdefault(game.channel_id, set()).add(key)
+        self.by_name.setdefault(game.game_name.casefold(), set()).add(key)
+        self.by_host.setdefault(game.host_id, set()).add(key)
+        for user_id in game.members():
+            self.by_member.setdefault(user_id, set()).add(key)
+        game.registry = self
+
+    def remove(self, message_id):
+        """Unregister a lobby, returning it (or None)"""
+        game = self.lobbies.pop(message_id, None)
+        if game is None:
+            return None
+        game.registry = None
+        self._discard(self.by_channel, game.channel_id, message_id)
+        self._discard(self.by_name, game.game_name.casefold(), message_id)
+        self._discard(self.by_host, game.host_id, message_id)
+        for user_id in game.members():
+            self._discard(self.by_member, user_id, message_id)
+        return game
+
+    def set_channel(self, game, channel_id):
+        """Record the channel of a registered lobby saved without one"""
+        self._discard(self.by_channel, game.channel_id, game.message_id)
+        game.channel_id = channel_id
+        self.by_channel.setdefault(channel_id, set()).add(game.message_id)
+
+    def index_member(self, game, user_id):
+        if game.is_member(user_id):
+            self.by_member.setdefault(user_id, set()).add(game.message_id)
+        else:
+            self._discard(self.by_member, user_id, game.message_id)
+
+    def in_channel(self, channel_id):
+        return self._lookup(self.by_channel, channel_id)
+
+    def named(self, name):
+        return self._lookup(self.by_name, name.casefold())
+
+    def hosted_by(self, host_id):
+        return self._lookup(self.by_host, host_id)
+
+    def of_member(self, user_id):
+        return self._lookup(self.by_member, str(user_id))
+
+    def _lookup(self, index, key):
+        """Lobbies in one index entry, oldest first"""
+        return [self.lobbies[message_id] for message_id in sorted(index.get(key, ()))]
+
+    @staticmethod
+    def _discard(index, key, message_id):
+        keys = index.get(key)
+        if keys is not None:
+            keys.discard(message_id)
+            if not keys:
+                del index[key]
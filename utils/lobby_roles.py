@@ -0,0 +1,124 @@
+# utils/lobby_roles.py
+import asyncio
+
+import discord
+from discord.utils import get
+
+
+class LobbyRoles:
+    """Role lookups and batched role changes for game lobbies
+
+    resolve() finds or creates a lobby role once per guild and name; callers
+    keep the returned id and pass it back, so later joins are a cache lookup
+    instead of a scan of guild.roles. Concurrent resolves of a missing role
+    wait on the same creation, so two joiners never create duplicates.
+
+    add()/remove() only record the role a member should end up with. After
+    window seconds all pending changes are applied with at most one
+    add_roles and one remove_roles call per member, so a join followed by a
+    leave costs nothing and a lobby closing clears its role member by
+    member without bursts.
+    """
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self._role_ids = {}
+        self._creating = {}
+        self._pending = {}
+        self._holders = {}
+        self._task = None
+
+    async def resolve(self, guild, name, role_id=None):
+        """Return the role called name, creating it if the guild has none"""
+        role = guild.get_role(role_id or self._role_ids.get((guild.id, name), 0))
+        if role:
+            return role
+        key = (guild.id, name)
+        task = self._creating.get(key)
+        if task is None:
+            task = self._creating[key] = asyncio.get_running_loop().create_task(self._find_or_create(guild, name))
+            task.add_done_callback(lambda _: self._creating.pop(key, None))
+        return await asyncio.shield(task)
+
+    def find(self, guild, name, role_id=None):
+        """Return the role called name, or None; never creates one"""
+        role = guild.get_role(role_id or self._role_ids.get((guild.id, name), 0))
+        if role is None:
+            role = get(guild.roles, name=name)
+            if role:
+                self._role_ids[(guild.id, name)] = role.id
+        return role
+
+    async def _find_or_create(self, guild, name):
+        role = get(guild.roles, name=name)
+        if not role:
+            role = await guild.create_role(name=name, reason="Game lobby role")
+        self._role_ids[(guild.id, name)] = role.id
+        return role
+
+    def add(self, member, role):
+        self._queue(member, role, True)
+
+    def remove(self, member, role):
+        self._queue(member, role, False)
+
+    async def clear(self, guild, role, user_ids):
+        """Queue removal of role from every listed member
+
+        Members this queue gave the role to are already known; anyone else
+        (e.g. after a restart) is fetched once.
+        """
+        holders = self._holders.get(role.id, {})
+        for user_id in map(int, user_ids):
+            member = holders.get(user_id) or guild.get_member(user_id)
+            if member is None:
+                try:
+                    member = await guild.fetch_member(user_id)
+                except discord.HTTPException:
+                    continue
+            self.remove(member, role)
+
+    def _queue(self, member, role, add):
+        key = (member.guild.id, member.id)
+        _, changes = self._pending.get(key, (None, {}))
+        # Keep the newest member object, its roles are the freshest snapshot
+        changes[role.id] = (role, add)
+        self._pending[key] = (member, changes)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        try:
+            while self._pending:
+                await asyncio.sleep(self.window)
+                pending, self._pending = self._pending, {}
+                for member, changes in pending.values():
+                    await self._apply(member, changes.values())
+        finally:
+            self._task = None
+
+    async def _apply(self, member, changes):
+        adds, removes = [], []
+        for role, add in changes:
+            has_role = member.get_role(role.id) is not None or member.id in self._holders.get(role.id, ())
+            if add and not has_role:
+                adds.append(role)
+            elif not add and has_role:
+                removes.append(role)
+
+        # Holders only change once Discord has accepted the change, so a
+        # failed add is tried again by the next join
+        if adds:
+            try:
+                await member.add_roles(*adds, reason="Joined game lobby")
+                for role in adds:
+                    self._holders.setdefault(role.id, {})[member.id] = member
+            except discord.HTTPException as e:
+                print(f"Error adding lobby roles to {member.id}: {e}")
+        if removes:
+            try:
+                await member.remove_roles(*removes, reason="Left game lobby")
+                for role in removes:
+                    self._holders.get(role.id, {}).pop(member.id, None)
+            except discord.HTTPException as e:
+                print(f"Error removing lobby roles from {member.id}: {e}")
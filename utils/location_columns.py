@@ -0,0 +1,133 @@
+# utils/location_columns.py
+from array import array
+
+import numpy as np
+
+
+class StringTable:
+    """Dictionary encoding of repeated strings ("Europe", "Germany") as small ints"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+
+class LocationColumns:
+    """Columnar in-memory copy of a location store
+
+    Coordinates live in array('d') columns and city/country/continent in
+    array('I') codes into shared StringTables, instead of one dict per user.
+    Users map to row numbers through an int-keyed dict; rows freed by
+    remove() are reused by the next insert, so the columns never need
+    compacting. A user id of 0 marks a free row, as Discord ids are never 0.
+    """
+
+    def __init__(self):
+        self.user_ids = array('Q')
+        self.lat = array('d')
+        self.lon = array('d')
+        self.city = array('I')
+        self.country = array('I')
+        self.continent = array('I')
+        self.usernames = []
+        self.strings = StringTable()
+        self.rows = {}
+        self.free = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, user_id):
+        return int(user_id) in self.rows
+
+    def row(self, user_id):
+        return self.rows.get(int(user_id))
+
+    def set(self, user_id, record):
+        """Insert or overwrite a user's record, returning its row"""
+        user_id = int(user_id)
+        values = (
+            user_id, record['lat'], record['lon'],
+            self.strings.encode(record['city']),
+            self.strings.encode(record['country']),
+            self.strings.encode(record['continent'])
+        )
+        columns = (self.user_ids, self.lat, self.lon, self.city, self.country, self.continent)
+
+        row = self.rows.get(user_id)
+        if row is None and self.free:
+            row = self.free.pop()
+        if row is None:
+            row = len(self.user_ids)
+            for column, value in zip(columns, values):
+                column.append(value)
+            self.usernames.append(record.get('username'))
+        else:
+            for column, value in zip(columns, values):
+                column[row] = value
+            self.usernames[row] = record.get('username')
+        self.rows[user_id] = row
+        return row
+
+    def remove(self, user_id):
+        """Free a user's row, returning it (or None if the user had none)"""
+        row = self.rows.pop(int(user_id), None)
+        if row is not None:
+            self.user_ids[row] = 0
+            self.usernames[row] = None
+            self.free.append(row)
+        return row
+
+    def point(self, user_id):
+        row = self.rows.get(int(user_id))
+        return None if row is None else (self.lat[row], self.lon[row])
+
+    def get(self, user_id):
+        """Return a user's location record, or None"""
+        row = self.rows.get(int(user_id))
+        if row is None:
+            return None
+        record = {
+            "city": self.strings.decode(self.city[row]),
+            "country": self.strings.decode(self.country[row]),
+            "continent": self.strings.decode(self.continent[row]),
+            "lat": self.lat[row],
+            "lon": self.lon[row]
+        }
+        if self.usernames[row] is not None:
+            record["username"] = self.usernames[row]
+        return record
+
+    def live_rows(self):
+        """Indexes of occupied rows, in row order"""
+        return np.flatnonzero(np.frombuffer(self.user_ids, dtype=np.uint64))
+
+    def coordinates(self):
+        """Return an (n, 2) float array of (lat, lon) for every user"""
+        rows = self.live_rows()
+        return np.column_stack([np.frombuffer(self.lat)[rows], np.frombuffer(self.lon)[rows]])
+
+    def points(self, names=None):
+        """Return (lat, lon, username, city, country) tuples for the map renderers
+
+        names optionally maps int user ids to display names that take
+        precedence over the stored usernames.
+        """
+        names = names or {}
+        decode = self.strings.decode
+        return [
+            (self.lat[row], self.lon[row],
+             names.get(self.user_ids[row]) or self.usernames[row] or "Unknown User",
+             decode(self.city[row]), decode(self.country[row]))
+            for row in self.live_rows().tolist()
+        ]
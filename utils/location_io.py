@@ -0,0 +1,239 @@
+# utils/location_io.py
+import asyncio
+import codecs
+import csv
+import io
+import json
+import re
+import time
+
+import aiohttp
+
+from utils.geocoder import GeocoderUnavailable
+
+EXPORT_FIELDS = ("user_id", "username", "city", "country", "continent", "lat", "lon")
+USER_ID_PATTERN = re.compile(r"^(?:<@!?)?(\d{15,21})>?$")
+
+# Unresolved rows listed in the import summary
+MAX_EXAMPLES = 10
+
+def detect_format(filename):
+    """Return "csv" or "ndjson" from an attachment's file name, or None"""
+    name = filename.lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return None
+
+async def stream_lines(url, chunk_size=64 * 1024):
+    """Yield decoded lines of a remote file without holding it in memory"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                buffer += decoder.decode(chunk)
+                *lines, buffer = buffer.split("\n")
+                for line in lines:
+                    yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.rstrip("\r")
+
+async def parse_rows(lines, fmt):
+    """Turn CSV (with a header row) or NDJSON lines into (line_number, row dict)
+
+    Rows that cannot be parsed are yielded as (line_number, None).
+    """
+    header = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+        elif header is None:
+            header = [name.strip().lower() for name in next(csv.reader([line]))]
+        else:
+            values = next(csv.reader([line]))
+            yield line_number, dict(zip(header, values))
+
+def write_export(rows, fp, fmt="csv"):
+    """Write (user_id, record) pairs to a binary file object, returning the row count"""
+    text = io.TextIOWrapper(fp, encoding="utf-8", newline="")
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_FIELDS)
+        for user_id, record in rows:
+            writer.writerow([user_id, *(record.get(field, "") for field in EXPORT_FIELDS[1:])])
+            count += 1
+    else:
+        for user_id, record in rows:
+            text.write(json.dumps({"user_id": user_id, **record}, ensure_ascii=False) + "\n")
+            count += 1
+    text.flush()
+    text.detach()
+    return count
+
+
+class ImportStats:
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.invalid = 0
+        self.not_found = 0
+        self.failed = 0
+        self.examples = []
+
+    def summary(self):
+        return (
+            f"{self.processed} rows processed: {self.imported} imported, "
+            f"{self.not_found} not found, {self.invalid} invalid, {self.failed} failed"
+        )
+
+
+class LocationImporter:
+    """Resolve imported rows to location records and commit them in batches
+
+    Rows carrying lat/lon are stored as-is; the rest are geocoded through the
+    shared GeocodingService, so cached and gazetteer hits cost nothing and
+    upstream lookups respect its rate limit. A bounded queue keeps at most a
+    few rows per worker in memory while the file is still being read.
+    """
+
+    def __init__(self, geocoder, get_continent, commit, progress=None,
+                 concurrency=8, batch_size=500, progress_interval=5.0):
+        self.geocoder = geocoder
+        self.get_continent = get_continent
+        self.commit = commit
+        self.progress = progress
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.progress_interval = progress_interval
+        self.stats = ImportStats()
+        self.batch = []
+        self._last_progress = time.monotonic()
+
+    async def run(self, rows):
+        """Import an async iterable of (line_number, row) and return ImportStats"""
+        queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        feed = asyncio.create_task(self._feed(rows, queue, len(workers)))
+        tasks = [feed, *workers]
+        try:
+            # A failing worker or feed ends the import instead of leaving the
+            # feed blocked on a queue nobody reads
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._flush()
+        return self.stats
+
+    async def _feed(self, rows, queue, workers):
+        async for item in rows:
+            await queue.put(item)
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def _worker(self, queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            line_number, row = item
+            await self._import_row(line_number, row)
+            self.stats.processed += 1
+            if len(self.batch) >= self.batch_size:
+                self._flush()
+            await self._report()
+
+    async def _import_row(self, line_number, row):
+        user_id = self._user_id(row)
+        if user_id is None:
+            self.stats.invalid += 1
+            self._example(line_number, "missing or invalid user_id")
+            return
+
+        try:
+            record = await self._record(row)
+        except GeocoderUnavailable:
+            self.stats.failed += 1
+            self._example(line_number, "geocoding service unavailable")
+            return
+        except (TypeError, ValueError):
+            # Out of range, unparsable or non-scalar ("lat": [1]) coordinates
+            self.stats.invalid += 1
+            self._example(line_number, "invalid coordinates")
+            return
+
+        if record is None:
+            self.stats.not_found += 1
+            self._example(line_number, f"location not found: {self._query(row) or '(empty)'}")
+            return
+
+        if row.get("username"):
+            record["username"] = str(row["username"])
+        self.batch.append((user_id, record))
+
+    async def _record(self, row):
+        if row.get("lat") not in (None, "") and row.get("lon") not in (None, ""):
+            lat, lon = float(row["lat"]), float(row["lon"])
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ValueError("coordinates out of range")
+            country = str(row.get("country") or "Unknown")
+            return {
+                "city": str(row.get("city") or "Unknown"),
+                "country": country,
+                "continent": str(row.get("continent") or self.get_continent(country)),
+                "lat": lat,
+                "lon": lon
+            }
+
+        query = self._query(row)
+        if not query:
+            return None
+        result = await self.geocoder.geocode(query)
+        return dict(result) if result else None
+
+    def _query(self, row):
+        if row.get("location"):
+            return str(row["location"]).strip()
+        parts = [str(row[field]).strip() for field in ("city", "country") if row.get(field)]
+        return ", ".join(parts)
+
+    def _user_id(self, row):
+        if not row:
+            return None
+        match = USER_ID_PATTERN.match(str(row.get("user_id", "")).strip())
+        return match.group(1) if match else None
+
+    def _example(self, line_number, reason):
+        if len(self.stats.examples) < MAX_EXAMPLES:
+            self.stats.examples.append(f"Line {line_number}: {reason}")
+
+    def _flush(self):
+        if self.batch:
+            batch, self.batch = self.batch, []
+            self.commit(batch)
+            self.stats.imported += len(batch)
+
+    async def _report(self):
+        if self.progress and time.monotonic() - self._last_progress >= self.progress_interval:
+            self._last_progress = time.monotonic()
+            try:
+                await self.progress(self.stats)
+            except Exception as e:
+                # Progress is cosmetic, e.g. the status message was deleted
+                print(f"Error reporting import progress: {e!r}")
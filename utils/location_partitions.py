@@ -0,0 +1,148 @@
+# utils/location_partitions.py
+import itertools
+import os
+import time
+
+from utils.location_columns import LocationColumns
+from utils.location_store import LocationStore
+from utils.spatial_index import SpatialIndex
+
+# Shared by all partitions so a reopened partition never reuses an old version
+_versions = itertools.count(1)
+
+
+class LocationPartition:
+    """One guild's location store with its in-memory working set
+
+    The store is the durable copy; columns holds the same locations in
+    columnar form for maps and lookups, and spatial_index indexes its rows.
+    Writes go through upsert/upsert_many/delete so all three stay in sync
+    and version changes whenever the data does.
+    """
+
+    def __init__(self, guild_id, store):
+        self.guild_id = guild_id
+        self.store = store
+        self.columns = LocationColumns()
+        for user_id, record in store.iter_all():
+            self.columns.set(user_id, record)
+        self.spatial_index = SpatialIndex(self.columns)
+        self.version = next(_versions)
+        self.last_used = time.monotonic()
+
+    def upsert(self, user_id, record):
+        self.store.upsert(user_id, record)
+        self._set(user_id, record)
+        self.version = next(_versions)
+
+    def upsert_many(self, records):
+        self.store.upsert_many(records)
+        for user_id, record in records:
+            self._set(user_id, record)
+        self.version = next(_versions)
+
+    def delete(self, user_id):
+        removed = self.store.delete(user_id)
+        row = self.columns.row(user_id)
+        if row is not None:
+            self.spatial_index.remove(row)
+            self.columns.remove(user_id)
+        if removed:
+            self.version = next(_versions)
+        return removed
+
+    def _set(self, user_id, record):
+        row = self.columns.row(user_id)
+        if row is not None:
+            self.spatial_index.remove(row)
+        self.spatial_index.insert(self.columns.set(user_id, record))
+
+    def close(self):
+        self.store.close()
+
+
+class LocationPartitions:
+    """Per-guild location partitions, opened on first use and closed when idle
+
+    Every guild has its own SQLite file in directory, so writes in one guild
+    never wait on another guild's database. A partition created while the
+    legacy global store still exists can be seeded with the legacy
+    locations of the guild's members (see legacy_user_ids); locations of
+    users from other servers are never copied in.
+    """
+
+    def __init__(self, directory, idle_timeout=900, legacy_db=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.idle_timeout = idle_timeout
+        self.legacy_db = legacy_db
+        self.partitions = {}
+
+    def __len__(self):
+        return len(self.partitions)
+
+    def path(self, guild_id):
+        return os.path.join(self.directory, f"{guild_id}.db")
+
+    def get(self, guild_id, members=None):
+        """Return the partition of a guild, opening (and creating) it if needed
+
+        members is a set of user ids; a partition created by this call is
+        seeded with their legacy locations.
+        """
+        partition = self.partitions.get(guild_id)
+        if partition is None:
+            path = self.path(guild_id)
+            is_new = not os.path.exists(path)
+            store = LocationStore(path)
+            if is_new and members:
+                self._import_legacy(store, members)
+            partition = self.partitions[guild_id] = LocationPartition(guild_id, store)
+        partition.last_used = time.monotonic()
+        return partition
+
+    def evict_idle(self):
+        """Close partitions unused for idle_timeout seconds, returning how many were closed"""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [guild_id for guild_id, partition in self.partitions.items() if partition.last_used < cutoff]
+        for guild_id in idle:
+            self.partitions.pop(guild_id).close()
+        return len(idle)
+
+    def close(self):
+        for partition in self.partitions.values():
+            partition.close()
+        self.partitions.clear()
+
+    def needs_legacy_import(self, guild_id):
+        """True if the guild has no partition yet and legacy data could seed it"""
+        return (
+            guild_id not in self.partitions
+            and not os.path.exists(self.path(guild_id))
+            and bool(self.legacy_db) and os.path.exists(self.legacy_db)
+        )
+
+    def legacy_user_ids(self):
+        """Ids of every user in the legacy global store"""
+        legacy = LocationStore(self.legacy_db)
+        try:
+            return [int(user_id) for user_id, _ in legacy.iter_all()]
+        finally:
+            legacy.close()
+
+    def _import_legacy(self, store, members):
+        if not self.legacy_db or not os.path.exists(self.legacy_db):
+            return
+        legacy = LocationStore(self.legacy_db)
+        try:
+            batch = []
+            for item in legacy.iter_all():
+                if int(item[0]) not in members:
+                    continue
+                batch.append(item)
+                if len(batch) >= 500:
+                    store.upsert_many(batch)
+                    batch = []
+            store.upsert_many(batch)
+        finally:
+            legacy.close()
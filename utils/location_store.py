@@ -0,0 +1,248 @@
+# utils/location_store.py
+import os
+import sqlite3
+
+from utils.data_manager import load_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL UNIQUE,
+    username TEXT,
+    city TEXT NOT NULL,
+    country TEXT NOT NULL,
+    continent TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_locations_region ON locations (continent, country, city, user_id);
+CREATE INDEX IF NOT EXISTS idx_locations_country_city ON locations (country, city, user_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS locations_rtree USING rtree (
+    id, min_lat, max_lat, min_lon, max_lon
+);
+
+CREATE TRIGGER IF NOT EXISTS locations_rtree_insert AFTER INSERT ON locations BEGIN
+    INSERT INTO locations_rtree VALUES (new.id, new.lat, new.lat, new.lon, new.lon);
+END;
+CREATE TRIGGER IF NOT EXISTS locations_rtree_update AFTER UPDATE OF lat, lon ON locations BEGIN
+    UPDATE locations_rtree
+    SET min_lat = new.lat, max_lat = new.lat, min_lon = new.lon, max_lon = new.lon
+    WHERE id = new.id;
+END;
+CREATE TRIGGER IF NOT EXISTS locations_rtree_delete AFTER DELETE ON locations BEGIN
+    DELETE FROM locations_rtree WHERE id = old.id;
+END;
+
+-- Number of users per city, kept up to date on every write. Country and
+-- continent totals are sums over this table, which has one row per city.
+CREATE TABLE IF NOT EXISTS location_counts (
+    continent TEXT NOT NULL,
+    country TEXT NOT NULL,
+    city TEXT NOT NULL,
+    users INTEGER NOT NULL,
+    PRIMARY KEY (continent, country, city)
+);
+CREATE INDEX IF NOT EXISTS idx_location_counts_country ON location_counts (country);
+
+CREATE TRIGGER IF NOT EXISTS location_counts_insert AFTER INSERT ON locations BEGIN
+    INSERT INTO location_counts VALUES (new.continent, new.country, new.city, 1)
+    ON CONFLICT (continent, country, city) DO UPDATE SET users = users + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS location_counts_update AFTER UPDATE OF continent, country, city ON locations
+WHEN old.continent IS NOT new.continent OR old.country IS NOT new.country OR old.city IS NOT new.city BEGIN
+    UPDATE location_counts SET users = users - 1
+    WHERE continent = old.continent AND country = old.country AND city = old.city;
+    DELETE FROM location_counts
+    WHERE continent = old.continent AND country = old.country AND city = old.city AND users <= 0;
+    INSERT INTO location_counts VALUES (new.continent, new.country, new.city, 1)
+    ON CONFLICT (continent, country, city) DO UPDATE SET users = users + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS location_counts_delete AFTER DELETE ON locations BEGIN
+    UPDATE location_counts SET users = users - 1
+    WHERE continent = old.continent AND country = old.country AND city = old.city;
+    DELETE FROM location_counts
+    WHERE continent = old.continent AND country = old.country AND city = old.city AND users <= 0;
+END;
+"""
+
+FIELDS = ("username", "city", "country", "continent", "lat", "lon")
+
+
+def _row_to_record(row):
+    record = {
+        "city": row["city"],
+        "country": row["country"],
+        "continent": row["continent"],
+        "lat": row["lat"],
+        "lon": row["lon"]
+    }
+    if row["username"] is not None:
+        record["username"] = row["username"]
+    return record
+
+
+class LocationStore:
+    """SQLite-backed store of user locations
+
+    Each user is one row, so setting or removing a location only touches that
+    row instead of rewriting every location. Lat/lon are mirrored into an
+    R*Tree for bounding-box queries, continent/country/city are indexed so
+    grouping and paging happen in the database, and per-city user counts are
+    maintained by triggers.
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def upsert(self, user_id, record):
+        """Insert or replace the location of a single user"""
+        with self.conn:
+            self._upsert(str(user_id), record)
+
+    def upsert_many(self, records):
+        """Insert or replace many (user_id, record) pairs in one transaction"""
+        with self.conn:
+            for user_id, record in records:
+                self._upsert(str(user_id), record)
+
+    def delete(self, user_id):
+        """Remove a user's location, returning True if one existed"""
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM locations WHERE user_id = ?", (str(user_id),))
+        return cursor.rowcount > 0
+
+    def get(self, user_id):
+        row = self.conn.execute(
+            "SELECT * FROM locations WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return _row_to_record(row) if row else None
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM locations").fetchone()[0]
+
+    def iter_all(self, batch_size=500):
+        """Yield (user_id, record) for every location without loading them all at once"""
+        cursor = self.conn.execute("SELECT * FROM locations ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield row["user_id"], _row_to_record(row)
+
+    def continent_counts(self):
+        """Return [(continent, users)] from the aggregate table"""
+        return self.conn.execute(
+            "SELECT continent, SUM(users) FROM location_counts GROUP BY continent ORDER BY continent"
+        ).fetchall()
+
+    def country_counts(self, continent=None):
+        """Return [(country, users)], optionally within one continent"""
+        where, params = ("WHERE continent = ?", (continent,)) if continent else ("", ())
+        return self.conn.execute(
+            f"SELECT country, SUM(users) FROM location_counts {where} GROUP BY country ORDER BY country",
+            params
+        ).fetchall()
+
+    def city_counts(self, country):
+        """Return [(city, users)] within one country"""
+        return self.conn.execute(
+            "SELECT city, SUM(users) FROM location_counts WHERE country = ? GROUP BY city ORDER BY city",
+            (country,)
+        ).fetchall()
+
+    def city_count(self, continent, country, city):
+        row = self.conn.execute(
+            "SELECT users FROM location_counts WHERE continent = ? AND country = ? AND city = ?",
+            (continent, country, city)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def region_count(self, continent=None, country=None):
+        """Return the number of users in a continent and/or country, or overall"""
+        conditions, params = [], []
+        if continent:
+            conditions.append("continent = ?")
+            params.append(continent)
+        if country:
+            conditions.append("country = ?")
+            params.append(country)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.conn.execute(f"SELECT COALESCE(SUM(users), 0) FROM location_counts {where}", params).fetchone()[0]
+
+    def find_region(self, name):
+        """Match a name to ("continent" | "country", canonical name), case-insensitively"""
+        for level in ("continent", "country"):
+            row = self.conn.execute(
+                f"SELECT {level} FROM location_counts WHERE {level} = ? COLLATE NOCASE LIMIT 1", (name,)
+            ).fetchone()
+            if row:
+                return level, row[0]
+        return None
+
+    def page(self, after=None, limit=30, continent=None, country=None):
+        """Return up to limit (continent, country, city, user_id) rows in region order
+
+        Paging is keyset-based: pass the last row of the previous page as
+        after, so each page costs the same regardless of how deep it is.
+        """
+        conditions, params = [], []
+        if continent:
+            conditions.append("continent = ?")
+            params.append(continent)
+        if country:
+            conditions.append("country = ?")
+            params.append(country)
+        if after:
+            conditions.append("(continent, country, city, user_id) > (?, ?, ?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.conn.execute(
+            f"SELECT continent, country, city, user_id FROM locations {where} "
+            "ORDER BY continent, country, city, user_id LIMIT ?",
+            (*params, limit)
+        ).fetchall()
+
+    def within_bbox(self, min_lat, max_lat, min_lon, max_lon):
+        """Return (user_id, lat, lon) for every location inside a bounding box"""
+        rows = self.conn.execute(
+            "SELECT l.user_id, l.lat, l.lon FROM locations_rtree r "
+            "JOIN locations l ON l.id = r.id "
+            "WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?",
+            (min_lat, max_lat, min_lon, max_lon)
+        )
+        return [tuple(row) for row in rows]
+
+    def migrate_from_json(self, json_path):
+        """Import a legacy locations.json once, then rename it out of the way
+
+        Returns the number of imported locations. Nothing is imported if the
+        store already holds data or the file does not exist.
+        """
+        if self.count() or not os.path.exists(json_path):
+            return 0
+
+        data = load_json(json_path)
+        self.upsert_many(data.items())
+        os.replace(json_path, json_path + ".migrated")
+        return len(data)
+
+    def _upsert(self, user_id, record):
+        self.conn.execute(
+            "INSERT INTO locations (user_id, username, city, country, continent, lat, lon) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET "
+            "username = excluded.username, city = excluded.city, country = excluded.country, "
+            "continent = excluded.continent, lat = excluded.lat, lon = excluded.lon",
+            (user_id, *(record.get(field) for field in FIELDS))
+        )
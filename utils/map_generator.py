@@ -1,18 +1,77 @@
 # utils/map_generator.py
 import folium
-from folium.plugins import HeatMap
+import json
+import numpy as np
+from folium.plugins import HeatMap, FastMarkerCluster
+from html import escape
 from io import BytesIO
+from string import Template
 
-def create_location_map(locations_data):
-    """Create a map with markers for each location"""
+# Above this many points the marker map switches to clustered rendering
+CLUSTER_THRESHOLD = 1000
+
+# Heatmap binning: aim for this many cells across the data extent, but keep
+# cells between these sizes (in degrees)
+HEATMAP_TARGET_CELLS = 256
+HEATMAP_MIN_CELL = 0.05
+HEATMAP_MAX_CELL = 2.0
+
+# Builds one circle marker per row of the compact [lat, lon, popup] array
+CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 6, color: '#7289da', fillColor: '#7289da', fillOpacity: 0.2
+    });
+    marker.bindPopup(row[2], {maxWidth: 250});
+    return marker;
+}
+"""
+
+# Standalone Leaflet page drawing every user from one GeoJSON layer. $data is
+# either the inlined FeatureCollection or a fetch() of it.
+GEOJSON_MAP_TEMPLATE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>User Locations</title>
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css">
+<script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
+<style>html,body,#map{height:100%;margin:0}</style>
+</head><body><div id="map"></div><script>
+var map=L.map("map",{preferCanvas:true}).setView([20,0],2);
+L.tileLayer("https://tile.openstreetmap.org/{z}/{x}/{y}.png",{maxZoom:19,attribution:"&copy; OpenStreetMap contributors"}).addTo(map);
+var style={radius:6,color:"#7289da",fillColor:"#7289da",fillOpacity:0.2,weight:3};
+function draw(data){L.geoJSON(data,{
+pointToLayer:function(f,latlng){return L.circleMarker(latlng,style)},
+onEachFeature:function(f,layer){layer.bindPopup("<b>"+f.properties.n+"</b><br>"+f.properties.p,{maxWidth:250})}
+}).addTo(map)}
+$data
+</script></body></html>
+""")
+
+def create_location_map(points, clustered=None):
+    """Create a map with markers for each location
+
+    Large sets are rendered as a marker cluster layer fed from one compact
+    array, which groups nearby users into markers showing their count.
+    clustered=None picks the mode based on CLUSTER_THRESHOLD.
+    """
     # Create Folium map with OpenStreetMap tiles
     m = folium.Map(tiles='OpenStreetMap')
-    
+
+    if clustered is None:
+        clustered = len(points) > CLUSTER_THRESHOLD
+    if clustered:
+        rows = [
+            [lat, lon, f"<b>{escape(username)}</b><br>{escape(city)}, {escape(country)}"]
+            for lat, lon, username, city, country in points
+        ]
+        FastMarkerCluster(rows, callback=CLUSTER_CALLBACK).add_to(m)
+        return m
+
     # Add markers with user info
-    for user_id, loc in locations_data.items():
-        popup = folium.Popup(f"<b>{loc['username']}</b><br>{loc['city']}, {loc['country']}", max_width=250)
+    for lat, lon, username, city, country in points:
+        popup = folium.Popup(f"<b>{username}</b><br>{city}, {country}", max_width=250)
         folium.CircleMarker(
-            location=[loc['lat'], loc['lon']],
+            location=[lat, lon],
             radius=6,
             popup=popup,
             color='#7289da',
@@ -23,16 +82,71 @@ def create_location_map(locations_data):
     # Return the map object
     return m
 
-def create_heatmap(locations_data):
+def geojson_points(points):
+    """Build a GeoJSON FeatureCollection of (lat, lon, username, city, country) points
+
+    Properties are kept short (n = name, p = place) and HTML-escaped, since
+    the map page puts them straight into popups.
+    """
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [round(lon, 5), round(lat, 5)]},
+                "properties": {"n": escape(username), "p": f"{escape(city)}, {escape(country)}"}
+            }
+            for lat, lon, username, city, country in points
+        ]
+    }
+
+def geojson_dumps(collection):
+    """Serialize GeoJSON compactly, safe to embed inside a <script> element"""
+    return json.dumps(collection, separators=(",", ":"), ensure_ascii=False).replace("</", "<\\/")
+
+def create_geojson_map(points=None, data_url=None):
+    """Create the marker map as one GeoJSON layer (HTML string)
+
+    Every user is one feature styled by a single shared function, instead of
+    a generated JavaScript object per marker. With data_url the page fetches
+    its points from there instead of carrying them inline.
+    """
+    if data_url is not None:
+        data = f"fetch({json.dumps(data_url)}).then(function(r){{return r.json()}}).then(draw);"
+    else:
+        data = f"draw({geojson_dumps(geojson_points(points))});"
+    return GEOJSON_MAP_TEMPLATE.substitute(data=data)
+
+def bin_points(points, cell_size=None):
+    """Snap points onto a lat/lon grid and return [lat, lon, weight] cells
+
+    Without an explicit cell_size the grid resolution adapts to the extent of
+    the data. Weights are normalized so the busiest cell has weight 1.
+    """
+    if isinstance(points, np.ndarray):
+        coords = points[:, :2].astype(np.float64, copy=False)
+    else:
+        coords = np.asarray([point[:2] for point in points], dtype=np.float64).reshape(-1, 2)
+    if not len(coords):
+        return []
+
+    if cell_size is None:
+        extent = np.ptp(coords, axis=0).max()
+        cell_size = min(max(extent / HEATMAP_TARGET_CELLS, HEATMAP_MIN_CELL), HEATMAP_MAX_CELL)
+
+    cells, counts = np.unique(np.floor(coords / cell_size).astype(np.int64), axis=0, return_counts=True)
+    centers = (cells + 0.5) * cell_size
+    centers[:, 0] = np.clip(centers[:, 0], -90, 90)
+    weights = counts / counts.max()
+    return np.column_stack([centers.round(4), weights.round(3)]).tolist()
+
+def create_heatmap(points, cell_size=None):
     """Create a heatmap of user locations"""
     # Create base map with OpenStreetMap tiles
     m = folium.Map(tiles='OpenStreetMap')
 
-    # Prepare data for heatmap (latitude, longitude, weight)
-    heatmap_data = []
-    for user_id, loc in locations_data.items():
-        # Add location to heatmap data
-        heatmap_data.append([loc['lat'], loc['lon']])
+    # Pre-bin points into weighted grid cells (latitude, longitude, weight)
+    heatmap_data = bin_points(points, cell_size)
 
     # Add HeatMap layer to the map
     if heatmap_data:
@@ -47,3 +161,17 @@ def map_to_bytes(map_obj):
     map_obj.save(map_buffer, close_file=False)
     map_buffer.seek(0)
     return map_buffer
+
+def render_location_map(points):
+    """Render the marker map to HTML bytes (runs in a render worker process)
+
+    Large sets keep the clustered folium map; smaller ones are emitted as a
+    single GeoJSON layer.
+    """
+    if len(points) > CLUSTER_THRESHOLD:
+        return map_to_bytes(create_location_map(points, clustered=True)).getvalue()
+    return create_geojson_map(points).encode()
+
+def render_heatmap(points):
+    """Render the heatmap to HTML bytes (runs in a render worker process)"""
+    return map_to_bytes(create_heatmap(points)).getvalue()
@@ -0,0 +1,108 @@
+# utils/render_cache.py
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+
+def _encode(value):
+    # NumPy arrays are hashed by shape and raw bytes rather than listed out
+    if hasattr(value, "tobytes"):
+        return [list(value.shape), hashlib.sha256(value.tobytes()).hexdigest()]
+    return list(value)
+
+
+class RenderCache:
+    """Content-addressed cache of rendered map files
+
+    Entries are keyed by a hash of the renderer inputs, so an unchanged
+    dataset maps to the same key. Recent entries are kept in memory up to
+    max_memory_bytes; entries evicted from memory spill to files in directory,
+    which are trimmed least-recently-used first to max_disk_bytes.
+
+    The URL of the Discord attachment an entry was last uploaded as can be
+    stored too, so identical requests can link to it instead of re-uploading.
+    """
+
+    def __init__(self, directory, max_memory_bytes=32 * 1024 * 1024,
+                 max_disk_bytes=256 * 1024 * 1024, url_ttl=12 * 3600):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.url_ttl = url_ttl
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.urls = {}
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        """Hash renderer name, parameters and input data into a cache key"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(parts, separators=(",", ":"), default=_encode).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return cached bytes for a key, or None"""
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+            return data
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        self._remember(key, data)
+
+    def get_url(self, key):
+        """Return the attachment URL of a recent upload of this entry, if any"""
+        entry = self.urls.get(key)
+        if entry and entry[1] > time.time():
+            return entry[0]
+        self.urls.pop(key, None)
+        return None
+
+    def set_url(self, key, url):
+        # Attachment URLs are signed and expire, so only reuse them for url_ttl
+        self.urls[key] = (url, time.time() + self.url_ttl)
+
+    def _remember(self, key, data):
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key))
+        self.memory[key] = data
+        self.memory_bytes += len(data)
+
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            old_key, old_data = self.memory.popitem(last=False)
+            self.memory_bytes -= len(old_data)
+            self._spill(old_key, old_data)
+
+    def _spill(self, key, data):
+        path = self._path(key)
+        if not os.path.exists(path):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._trim_disk()
+
+    def _trim_disk(self):
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".bin")]
+        total = sum(entry.stat().st_size for entry in files)
+        for entry in sorted(files, key=lambda e: e.stat().st_mtime):
+            if total <= self.max_disk_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
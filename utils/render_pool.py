@@ -0,0 +1,47 @@
+# utils/render_pool.py
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+class RenderPool:
+    """Runs CPU-heavy map rendering in worker processes
+
+    At most max_concurrent renders run at once; further requests wait their
+    turn and are counted in queue_depth.
+    """
+
+    def __init__(self, workers=2, max_concurrent=2):
+        self.workers = workers
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.queue_depth = 0
+        self.active = 0
+        self.executor = None
+
+    async def render(self, func, *args):
+        """Run func(*args) in a worker process and return its result"""
+        if self.executor is None:
+            # Spawn rather than fork so workers don't inherit the bot's loop and sockets
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        self.queue_depth += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.active -= 1
+            self.semaphore.release()
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
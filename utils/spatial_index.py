@@ -0,0 +1,89 @@
+# utils/spatial_index.py
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance in km from one point to arrays of points"""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class SpatialIndex:
+    """Grid index over the rows of a LocationColumns table for radius queries
+
+    Rows are bucketed into cell_size x cell_size degree cells. A radius query
+    only looks at the cells overlapping the query's bounding box and then
+    filters those candidates with a vectorized haversine distance over the
+    coordinate columns.
+    """
+
+    def __init__(self, columns, cell_size=1.0):
+        self.columns = columns
+        self.cell_size = cell_size
+        self.cells = {}
+        for row in columns.live_rows().tolist():
+            self.insert(row)
+
+    def insert(self, row):
+        """Index a row at its current coordinates"""
+        self.cells.setdefault(self._cell(self.columns.lat[row], self.columns.lon[row]), set()).add(row)
+
+    def remove(self, row):
+        """Unindex a row; call before its coordinates are overwritten"""
+        cell = self._cell(self.columns.lat[row], self.columns.lon[row])
+        members = self.cells.get(cell)
+        if members is None:
+            return
+        members.discard(row)
+        if not members:
+            del self.cells[cell]
+
+    def query_radius(self, lat, lon, radius_km):
+        """Return [(user_id, distance_km)] within radius_km, nearest first"""
+        candidates = np.fromiter(
+            (row for cell in self._cells_within(lat, lon, radius_km) for row in self.cells.get(cell, ())),
+            dtype=np.int64
+        )
+        if not len(candidates):
+            return []
+
+        lats = np.frombuffer(self.columns.lat)[candidates]
+        lons = np.frombuffer(self.columns.lon)[candidates]
+        distances = haversine_km(lat, lon, lats, lons)
+        inside = np.nonzero(distances <= radius_km)[0]
+        inside = inside[np.argsort(distances[inside])]
+        user_ids = self.columns.user_ids
+        return [(str(user_ids[candidates[i]]), float(distances[i])) for i in inside]
+
+    def _cell(self, lat, lon):
+        lon = (lon + 180) % 360 - 180
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def _cells_within(self, lat, lon, radius_km):
+        lat_delta = radius_km / KM_PER_DEGREE
+        min_lat, max_lat = max(lat - lat_delta, -90.0), min(lat + lat_delta, 90.0)
+
+        # Longitude degrees shrink towards the poles; near them, scan every longitude
+        widest = max(abs(min_lat), abs(max_lat))
+        if widest >= 89.0:
+            lon_delta = 180.0
+        else:
+            lon_delta = min(lat_delta / math.cos(math.radians(widest)), 180.0)
+
+        rows = range(math.floor(min_lat / self.cell_size), math.floor(max_lat / self.cell_size) + 1)
+        columns_per_world = math.ceil(360 / self.cell_size)
+        first = math.floor((lon - lon_delta) / self.cell_size)
+        last = math.floor((lon + lon_delta) / self.cell_size)
+        if last - first + 1 >= columns_per_world:
+            first, last = math.floor(-180 / self.cell_size), math.floor(-180 / self.cell_size) + columns_per_world - 1
+
+        # Wrap columns across the antimeridian back into [-180, 180)
+        offset = math.floor(-180 / self.cell_size)
+        columns = {(column - offset) % columns_per_world + offset for column in range(first, last + 1)}
+        return [(row, column) for row in rows for column in columns]
@@ -0,0 +1,145 @@
+# utils/static_map.py
+import json
+import os
+import struct
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+WORLD_OUTLINE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "world_outline.json"
+)
+
+WIDTH = 1024
+HEIGHT = 512
+
+# Colours roughly matching Discord's dark theme
+OCEAN = (32, 34, 37)
+LAND = (54, 57, 63)
+BORDER = (79, 84, 92)
+MARKER = (114, 137, 218)
+MARKER_OUTLINE = (255, 255, 255)
+HEAT_LOW = np.array([255, 235, 59], dtype=np.float32)
+HEAT_HIGH = np.array([244, 67, 54], dtype=np.float32)
+
+def project(coords, width, height):
+    """Project (lat, lon) rows onto pixel (x, y) of an equirectangular image"""
+    x = ((coords[:, 1] + 180) / 360 * width).astype(np.int64).clip(0, width - 1)
+    y = ((90 - coords[:, 0]) / 180 * height).astype(np.int64).clip(0, height - 1)
+    return x, y
+
+@lru_cache(maxsize=4)
+def base_map(width=WIDTH, height=HEIGHT):
+    """Rasterize the bundled world outline (cached per worker process)"""
+    with open(WORLD_OUTLINE_FILE) as f:
+        outline = json.load(f)
+
+    # Pixel-space edges of every ring
+    edges = []
+    for ring in outline["rings"]:
+        ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2) / outline["scale"]
+        px = (ring[:, 0] + 180) / 360 * width
+        py = (90 - ring[:, 1]) / 180 * height
+        edges.append(np.column_stack([px, py, np.roll(px, -1), np.roll(py, -1)]))
+    x0, y0, x1, y1 = np.concatenate(edges).T
+
+    # Even-odd scanline fill: count edge crossings left of each pixel centre
+    row_centers = np.arange(height) + 0.5
+    crosses = (y0[None, :] <= row_centers[:, None]) != (y1[None, :] <= row_centers[:, None])
+    rows, edge_idx = np.nonzero(crosses)
+    t = (row_centers[rows] - y0[edge_idx]) / (y1[edge_idx] - y0[edge_idx])
+    xs = x0[edge_idx] + t * (x1[edge_idx] - x0[edge_idx])
+    toggles = np.zeros((height, width + 1), dtype=np.int32)
+    np.add.at(toggles, (rows, np.ceil(xs - 0.5).astype(np.int64).clip(0, width)), 1)
+    land = (np.cumsum(toggles, axis=1)[:, :width] % 2).astype(bool)
+
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = OCEAN
+    image[land] = LAND
+
+    # Country borders: sample every edge at least once per pixel
+    steps = np.ceil(np.maximum(abs(x1 - x0), abs(y1 - y0))).astype(np.int64) + 1
+    t = np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)
+    t = t / np.repeat(steps, steps)
+    bx = (np.repeat(x0, steps) + t * np.repeat(x1 - x0, steps)).astype(np.int64).clip(0, width - 1)
+    by = (np.repeat(y0, steps) + t * np.repeat(y1 - y0, steps)).astype(np.int64).clip(0, height - 1)
+    image[by, bx] = BORDER
+
+    image.setflags(write=False)
+    return image
+
+def _dilate(mask, radius):
+    """Grow a boolean mask into discs of the given pixel radius"""
+    height, width = mask.shape
+    padded = np.pad(mask, radius)
+    out = np.zeros_like(mask)
+    for dy in range(-radius, radius + 1):
+        for dx in range(-radius, radius + 1):
+            if dx * dx + dy * dy <= radius * radius:
+                out |= padded[radius + dy:radius + dy + height, radius + dx:radius + dx + width]
+    return out
+
+def _box_blur(values, radius):
+    """Separable box blur using cumulative sums"""
+    for axis in (0, 1):
+        padded = np.pad(values, [(radius + 1, radius) if a == axis else (0, 0) for a in (0, 1)])
+        summed = np.cumsum(padded, axis=axis)
+        if axis == 0:
+            values = (summed[2 * radius + 1:] - summed[:-2 * radius - 1]) / (2 * radius + 1)
+        else:
+            values = (summed[:, 2 * radius + 1:] - summed[:, :-2 * radius - 1]) / (2 * radius + 1)
+    return values
+
+def _coords(points):
+    if isinstance(points, np.ndarray):
+        return points[:, :2].astype(np.float64, copy=False)
+    return np.asarray([point[:2] for point in points], dtype=np.float64).reshape(-1, 2)
+
+def encode_png(image):
+    """Encode an RGB uint8 array as PNG bytes"""
+    height, width, _ = image.shape
+    rows = image.reshape(height, width * 3).astype(np.int16)
+    # "Sub" filter: store each byte minus the byte one pixel to the left
+    filtered = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    filtered[:, 0] = 1
+    filtered[:, 1:4] = rows[:, :3]
+    filtered[:, 4:] = (rows[:, 3:] - rows[:, :-3]) & 0xFF
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(filtered.tobytes(), 9))
+        + chunk(b"IEND", b"")
+    )
+
+def render_location_png(points, width=WIDTH, height=HEIGHT):
+    """Render user locations as dots on a static world map (PNG bytes)"""
+    image = base_map(width, height).copy()
+    coords = _coords(points)
+    if len(coords):
+        mask = np.zeros((height, width), dtype=bool)
+        mask[project(coords, width, height)[::-1]] = True
+        image[_dilate(mask, 4)] = MARKER_OUTLINE
+        image[_dilate(mask, 3)] = MARKER
+    return encode_png(image)
+
+def render_heatmap_png(points, width=WIDTH, height=HEIGHT):
+    """Render user density as a heat overlay on a static world map (PNG bytes)"""
+    image = base_map(width, height).astype(np.float32)
+    coords = _coords(points)
+    if len(coords):
+        density = np.zeros((height, width), dtype=np.float64)
+        x, y = project(coords, width, height)
+        np.add.at(density, (y, x), 1)
+        for _ in range(3):
+            density = _box_blur(density, 3)
+        # Square root keeps single users visible next to dense cities
+        intensity = np.sqrt(density / density.max())[:, :, None]
+        alpha = np.clip(intensity * 2, 0, 0.85)
+        color = HEAT_LOW + (HEAT_HIGH - HEAT_LOW) * intensity
+        image = image * (1 - alpha) + color * alpha
+    return encode_png(image.round().astype(np.uint8))
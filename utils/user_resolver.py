@@ -0,0 +1,134 @@
+# utils/user_resolver.py
+import asyncio
+import time
+from collections import OrderedDict
+
+import discord
+
+# Most user ids a single gateway member request accepts
+QUERY_CHUNK = 100
+
+class UserResolver:
+    """Shared lookup of Discord users for every cog
+
+    Users are looked up in the guild member cache and the client's user cache
+    first, then in a TTL'd LRU of previously fetched users and members. For
+    many ids in a guild, misses are requested over the gateway in chunks of
+    100 with query_members (no members intent needed), and only ids that are
+    still unknown are fetched over REST with bounded concurrency. Member and
+    user update events invalidate cached entries.
+    """
+
+    def __init__(self, bot, ttl=3600, max_entries=10000, concurrency=5):
+        self.bot = bot
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self._inflight = {}
+
+        bot.add_listener(self.on_member_update)
+        bot.add_listener(self.on_user_update)
+        bot.add_listener(self.on_member_remove)
+
+    async def resolve(self, user_id, guild=None):
+        """Return the member or user for an id, or None if it doesn't exist"""
+        user_id = int(user_id)
+        user = self._cached(user_id, guild)
+        if user is not None:
+            return user
+
+        future = self._inflight.get(user_id)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(user_id))
+            self._inflight[user_id] = future
+            future.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        return await asyncio.shield(future)
+
+    async def resolve_many(self, user_ids, guild=None):
+        """Resolve many ids at once, returning a dict of id -> user or None"""
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+        if guild:
+            missing = [
+                user_id for user_id in user_ids
+                if user_id not in self._inflight and self._cached(user_id, guild) is None
+            ]
+            for start in range(0, len(missing), QUERY_CHUNK):
+                await self._query_members(guild, missing[start:start + QUERY_CHUNK])
+        users = await asyncio.gather(*(self.resolve(user_id, guild) for user_id in user_ids))
+        return dict(zip(user_ids, users))
+
+    async def display_names(self, user_ids, guild=None, default="Unknown User"):
+        """Return a dict of id -> display name for many ids"""
+        users = await self.resolve_many(user_ids, guild)
+        return {user_id: user.display_name if user else default for user_id, user in users.items()}
+
+    def invalidate(self, user_id, guild_id=None):
+        self.entries.pop(int(user_id), None)
+        if guild_id is not None:
+            self.entries.pop((guild_id, int(user_id)), None)
+
+    async def on_member_update(self, before, after):
+        self.invalidate(after.id, after.guild.id)
+
+    async def on_user_update(self, before, after):
+        self.invalidate(after.id)
+
+    async def on_member_remove(self, member):
+        self.invalidate(member.id, member.guild.id)
+
+    def _cached(self, user_id, guild):
+        if guild:
+            member = guild.get_member(user_id)
+            if member:
+                return member
+
+            # Members from query_members are cached per guild, as nicknames differ
+            member = self._entry((guild.id, user_id))
+            if member:
+                return member
+
+        user = self.bot.get_user(user_id)
+        if user:
+            return user
+        return self._entry(user_id)
+
+    def _entry(self, key):
+        entry = self.entries.get(key)
+        if entry:
+            user, expires = entry
+            if expires > time.monotonic():
+                self.entries.move_to_end(key)
+                return user
+            del self.entries[key]
+        return None
+
+    def _remember(self, key, user):
+        self.entries[key] = (user, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def _query_members(self, guild, user_ids):
+        try:
+            members = await guild.query_members(user_ids=user_ids, limit=len(user_ids), cache=False)
+        except (asyncio.TimeoutError, discord.ClientException) as e:
+            # The ids fall back to REST fetches
+            print(f"Error querying members of {guild.id}: {e!r}")
+            return
+        for member in members:
+            self._remember((guild.id, member.id), member)
+
+    async def _fetch(self, user_id):
+        async with self.semaphore:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except discord.NotFound:
+                return None
+            except discord.HTTPException as e:
+                # Not cached, so the next lookup tries again
+                print(f"Error fetching user {user_id}: {e}")
+                return None
+
+        self._remember(user_id, user)
+        return user